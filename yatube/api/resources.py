@@ -0,0 +1,100 @@
+'''
+Поля ресурсов API: публичное имя -> путь для .values(). Клиент выбирает
+подмножество параметром fields=, и в SQL попадают только нужные столбцы
+и JOIN-ы.
+'''
+from django.core.files.storage import default_storage
+
+
+def media_url(name):
+    return default_storage.url(name) if name else None
+
+
+class FieldsError(ValueError):
+    pass
+
+
+class Resource:
+    fields = {}
+    # Поля, которые отдаются, если fields= не задан
+    default = ()
+    # Поля, нужные самой пагинации; в ответ они не попадают без запроса
+    required = ('id',)
+
+    def __init__(self, requested: str = None):
+        if requested:
+            names = [
+                name for name in map(str.strip, requested.split(',')) if name]
+            unknown = [name for name in names if name not in self.fields]
+            if unknown:
+                raise FieldsError(
+                    'Неизвестные поля: {}. Доступны: {}'.format(
+                        ', '.join(unknown), ', '.join(self.fields)))
+        else:
+            names = list(self.default or self.fields)
+        self.names = names
+
+    # Преобразования значений при выдаче: имя поля -> функция
+    converters = {}
+
+    def values(self, queryset):
+        '''queryset.values() только с запрошенными и служебными полями.'''
+        paths = dict.fromkeys(
+            self.fields[name] for name in (*self.required, *self.names))
+        return queryset.values(*paths)
+
+    def render(self, row: dict) -> dict:
+        data = {}
+        for name in self.names:
+            value = row[self.fields[name]]
+            if name in self.converters:
+                value = self.converters[name](value)
+            data[name] = value
+        return data
+
+
+class PostResource(Resource):
+    fields = {
+        'id': 'id',
+        'text': 'text',
+        'pub_date': 'pub_date',
+        'author': 'author__username',
+        'group': 'group__slug',
+        'image': 'image',
+        'comments_count': 'comments_count',
+    }
+    default = ('id', 'text', 'pub_date', 'author', 'group', 'image')
+    required = ('id', 'pub_date')
+    converters = {'image': media_url}
+
+
+class GroupResource(Resource):
+    fields = {
+        'id': 'id',
+        'title': 'title',
+        'slug': 'slug',
+        'description': 'description',
+        'posts_count': 'posts_count',
+    }
+
+
+class ProfileResource(Resource):
+    fields = {
+        'id': 'id',
+        'username': 'username',
+        'first_name': 'first_name',
+        'last_name': 'last_name',
+        'posts_count': 'counters__posts_count',
+        'followers_count': 'counters__followers_count',
+        'following_count': 'counters__following_count',
+    }
+
+
+class CommentResource(Resource):
+    fields = {
+        'id': 'id',
+        'text': 'text',
+        'author': 'author__username',
+        'created': 'created',
+    }
+    required = ('id', 'created')
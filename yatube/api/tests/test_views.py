@@ -0,0 +1,121 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class ApiViewsTest(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.author = User.objects.create_user(
+            username='leo', first_name='Лев')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='группа', slug='group', description='описание')
+        cls.posts = [
+            Post.objects.create(
+                author=cls.author, group=cls.group, text=f'пост {number}')
+            for number in range(5)
+        ]
+        Comment.objects.create(
+            post=cls.posts[0], author=cls.reader, text='комментарий')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self) -> None:
+        self.client = Client()
+        caches['default'].clear()
+
+    def test_sparse_fields(self):
+        '''fields= сужает и ответ, и SELECT'''
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(
+                reverse('api:posts'), {'fields': 'id,author'})
+        results = response.json()['results']
+        self.assertEqual(set(results[0]), {'id', 'author'})
+        self.assertEqual(results[0]['author'], 'leo')
+        sql = queries.captured_queries[-1]['sql']
+        self.assertNotIn('"text"', sql)
+        self.assertNotIn('posts_group', sql)
+
+    def test_unknown_field(self):
+        response = self.client.get(reverse('api:posts'), {'fields': 'secret'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('error', response.json())
+
+    def test_blank_fields_ignored(self):
+        response = self.client.get(
+            reverse('api:posts'), {'fields': 'id, ,author,'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            set(response.json()['results'][0]), {'id', 'author'})
+
+    @override_settings(LIMIT=2)
+    def test_cursor_pagination(self):
+        response = self.client.get(reverse('api:posts'), {'fields': 'text'})
+        data = response.json()
+        self.assertEqual(
+            [post['text'] for post in data['results']], ['пост 4', 'пост 3'])
+        data = self.client.get(
+            reverse('api:posts'), {'fields': 'text', 'after': data['next']}
+        ).json()
+        self.assertEqual(
+            [post['text'] for post in data['results']], ['пост 2', 'пост 1'])
+
+    def test_etag(self):
+        url = reverse('api:post', args=(self.posts[0].pk,))
+        response = self.client.get(url)
+        self.assertEqual(response.json()['text'], 'пост 0')
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_etag_changes_with_comments(self):
+        '''Новый комментарий меняет ETag, если запрошен comments_count'''
+        url = reverse('api:post', args=(self.posts[1].pk,))
+        params = {'fields': 'id,comments_count'}
+        etag = self.client.get(url, params)['ETag']
+        Comment.objects.create(
+            post=self.posts[1], author=self.reader, text='ещё комментарий')
+        response = self.client.get(url, params, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['comments_count'], 1)
+
+    def test_resources(self):
+        profile = self.client.get(
+            reverse('api:profile', args=('leo',)),
+            {'fields': 'username,followers_count'}
+        ).json()
+        self.assertEqual(profile, {'username': 'leo', 'followers_count': 1})
+        groups = self.client.get(reverse('api:groups')).json()['results']
+        self.assertEqual(groups[0]['posts_count'], 5)
+        comments = self.client.get(
+            reverse('api:comments', args=(self.posts[0].pk,))
+        ).json()['results']
+        self.assertEqual(comments[0]['author'], 'reader')
+        response = self.client.get(reverse('api:group', args=('missing',)))
+        self.assertEqual(response.status_code, 404)
+
+    def test_follow_feed(self):
+        self.assertEqual(
+            self.client.get(reverse('api:follow')).status_code, 401)
+        self.client.force_login(self.reader)
+        results = self.client.get(reverse('api:follow')).json()['results']
+        self.assertEqual(len(results), 5)
+
+    def test_follow_feed_etag_changes_with_comments(self):
+        '''Комментарий к посту из ленты подписок меняет её ETag'''
+        self.client.force_login(self.reader)
+        url = reverse('api:follow')
+        params = {'fields': 'id,comments_count'}
+        etag = self.client.get(url, params)['ETag']
+        Comment.objects.create(
+            post=self.posts[4], author=self.reader, text='ещё комментарий')
+        response = self.client.get(url, params, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['results'][0]['comments_count'], 1)
@@ -0,0 +1,19 @@
+from django.urls import path
+
+from . import views
+
+app_name = 'api'
+
+urlpatterns = [
+    path('posts/', views.post_list, name='posts'),
+    path('posts/<int:post_id>/', views.post_detail, name='post'),
+    path(
+        'posts/<int:post_id>/comments/',
+        views.comment_list,
+        name='comments'
+    ),
+    path('groups/', views.group_list, name='groups'),
+    path('groups/<slug:slug>/', views.group_detail, name='group'),
+    path('profiles/<str:username>/', views.profile, name='profile'),
+    path('follow/', views.follow_feed, name='follow'),
+]
@@ -0,0 +1,198 @@
+from functools import wraps
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Max
+from django.http import Http404, HttpResponse, JsonResponse
+from django.views.decorators.http import condition, require_safe
+
+from core.routers import use_replica
+from posts.caching import comments_version, feed_version
+from posts.conditional import conditional, follow_state, make_etag
+from posts.models import Comment, Group, Post, User
+from posts.pagination import CursorPaginator
+
+from .resources import (
+    CommentResource, FieldsError, GroupResource, PostResource,
+    ProfileResource
+)
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def json_response(data, status=200) -> HttpResponse:
+    '''Ответ через orjson, если он установлен, иначе стандартный json.'''
+    if orjson is not None:
+        return HttpResponse(
+            orjson.dumps(data),
+            status=status,
+            content_type='application/json'
+        )
+    return JsonResponse(
+        data,
+        status=status,
+        encoder=DjangoJSONEncoder,
+        json_dumps_params={'ensure_ascii': False, 'separators': (',', ':')}
+    )
+
+
+def api_view(view):
+    '''Ошибки API отдаются JSON-ом, а не HTML-страницами.'''
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        try:
+            return view(request, *args, **kwargs)
+        except FieldsError as error:
+            return json_response({'error': str(error)}, status=400)
+        except Http404:
+            return json_response({'error': 'Не найдено'}, status=404)
+    return require_safe(wrapper)
+
+
+def page_size(request) -> int:
+    try:
+        size = int(request.GET.get('limit', settings.LIMIT))
+    except ValueError:
+        size = settings.LIMIT
+    return min(max(size, 1), settings.API_MAX_LIMIT)
+
+
+def cursor_list(request, queryset, resource, field) -> HttpResponse:
+    page = CursorPaginator(
+        resource.values(queryset), page_size(request), field=field
+    ).get_page(
+        after=request.GET.get('after'), before=request.GET.get('before'))
+    return json_response({
+        'results': [resource.render(row) for row in page],
+        'next': page.next_cursor,
+        'previous': page.previous_cursor,
+    })
+
+
+def get_row(resource, queryset) -> HttpResponse:
+    row = resource.values(queryset).first()
+    if row is None:
+        raise Http404
+    return json_response(resource.render(row))
+
+
+def feed_etag(request, *args, **kwargs):
+    # Версия ленты меняется при любой правке постов, групп и авторов.
+    return make_etag(request, 'api', feed_version())
+
+
+def comments_parts(request) -> tuple:
+    # Число комментариев версия ленты не отражает.
+    if 'comments_count' in PostResource(request.GET.get('fields')).names:
+        return (comments_version(),)
+    return ()
+
+
+def post_etag(request, *args, **kwargs):
+    return make_etag(
+        request, 'api', feed_version(), *comments_parts(request))
+
+
+def follow_feed_state(request):
+    state = follow_state(request)
+    return state and state._replace(
+        etag_parts=(*state.etag_parts, *comments_parts(request)))
+
+
+def profile_etag(request, username):
+    counters = User.objects.filter(username=username).values_list(
+        'counters__followers_count', 'counters__following_count').first()
+    return make_etag(request, 'api', feed_version(), counters)
+
+
+def comments_etag(request, post_id):
+    state = Post.objects.filter(pk=post_id).order_by().values_list(
+        'comments_count').annotate(last=Max('comments__created')).first()
+    return make_etag(request, 'api', state)
+
+
+@use_replica
+@api_view
+@condition(etag_func=post_etag)
+def post_list(request):
+    posts = Post.objects.all()
+    if request.GET.get('author'):
+        posts = posts.filter(author__username=request.GET['author'])
+    if request.GET.get('group'):
+        posts = posts.filter(group__slug=request.GET['group'])
+    return cursor_list(
+        request, posts, PostResource(request.GET.get('fields')), 'pub_date')
+
+
+@use_replica
+@api_view
+@condition(etag_func=post_etag)
+def post_detail(request, post_id):
+    return get_row(
+        PostResource(request.GET.get('fields')),
+        Post.objects.filter(pk=post_id)
+    )
+
+
+@use_replica
+@api_view
+@condition(etag_func=feed_etag)
+def group_list(request):
+    resource = GroupResource(request.GET.get('fields'))
+    return json_response({
+        'results': [
+            resource.render(row)
+            for row in resource.values(Group.objects.all())
+        ],
+    })
+
+
+@use_replica
+@api_view
+@condition(etag_func=feed_etag)
+def group_detail(request, slug):
+    return get_row(
+        GroupResource(request.GET.get('fields')),
+        Group.objects.filter(slug=slug)
+    )
+
+
+@use_replica
+@api_view
+@condition(etag_func=profile_etag)
+def profile(request, username):
+    return get_row(
+        ProfileResource(request.GET.get('fields')),
+        User.objects.filter(username=username)
+    )
+
+
+@use_replica
+@api_view
+@condition(etag_func=comments_etag)
+def comment_list(request, post_id):
+    if not Post.objects.filter(pk=post_id).exists():
+        raise Http404
+    return cursor_list(
+        request,
+        Comment.objects.filter(post_id=post_id),
+        CommentResource(request.GET.get('fields')),
+        'created'
+    )
+
+
+@use_replica
+@api_view
+@conditional(follow_feed_state, 'api')
+def follow_feed(request, state):
+    if state is None:
+        return json_response({'error': 'Нужна авторизация'}, status=401)
+    return cursor_list(
+        request,
+        Post.objects.filter(pk__in=state.data['post_ids']),
+        PostResource(request.GET.get('fields')),
+        'pub_date'
+    )
@@ -0,0 +1,32 @@
+import sqlite3
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+
+
+class Command(BaseCommand):
+    help = (
+        'Копирует основную SQLite-базу в реплики из DATABASE_REPLICAS '
+        '(для локальной проверки маршрутизации)'
+    )
+
+    def handle(self, *args, **options):
+        databases = settings.DATABASES
+        if databases[DEFAULT_DB_ALIAS]['ENGINE'] != (
+                'django.db.backends.sqlite3'):
+            raise CommandError('Поддерживается только SQLite')
+        if not settings.DATABASE_REPLICAS:
+            raise CommandError(
+                'Реплики не настроены: задайте YATUBE_REPLICA_DB')
+        source = sqlite3.connect(databases[DEFAULT_DB_ALIAS]['NAME'])
+        try:
+            for alias in settings.DATABASE_REPLICAS:
+                target = sqlite3.connect(databases[alias]['NAME'])
+                try:
+                    source.backup(target)
+                finally:
+                    target.close()
+                self.stdout.write(self.style.SUCCESS(f'{alias}: скопировано'))
+        finally:
+            source.close()
@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand
+
+from core.warmup import warm_templates
+
+
+class Command(BaseCommand):
+    help = (
+        'Заранее компилирует все шаблоны и печатает время разбора '
+        'и рендера каждого'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--render', action='store_true',
+            help='Ещё и отрендерить каждый шаблон с пустым контекстом')
+        parser.add_argument(
+            '--prefix', default='',
+            help='Только шаблоны с таким началом имени, например posts/')
+        parser.add_argument(
+            '--engine', help='Только этот движок: django или jinja2')
+
+    def handle(self, *args, **options):
+        results = warm_templates(
+            render=options['render'],
+            prefix=options['prefix'],
+            using=options['engine'],
+        )
+        results.sort(key=lambda result: result['compile'] or 0, reverse=True)
+        for result in results:
+            render = (
+                f'{result["render"] * 1000:8.2f}'
+                if result['render'] is not None else ' ' * 8
+            )
+            compile_ms = (
+                f'{result["compile"] * 1000:8.2f}'
+                if result['compile'] is not None else ' ' * 8
+            )
+            name = f'{result["engine"]}:{result["name"]}'
+            line = f'{compile_ms} {render}  {name}'
+            if result['error']:
+                line += f'  ({result["error"]})'
+            self.stdout.write(line)
+        total = sum(result['compile'] or 0 for result in results)
+        self.stdout.write(self.style.SUCCESS(
+            f'Шаблонов: {len(results)}, разбор {total * 1000:.1f} мс'))
@@ -0,0 +1,188 @@
+'''
+Счётчики запроса: число SQL-запросов и их время, время рендера
+шаблонов, попадания и промахи кэша. collect_metrics() собирает их
+для любого блока кода, MetricsMiddleware — для каждого запроса.
+'''
+import time
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.cache.backends.memcached import MemcachedCache
+from django.db import connections
+from django.template.backends.django import Template
+
+current = ContextVar('metrics', default=None)
+
+_MISSING = object()
+
+
+class Metrics:
+    def __init__(self):
+        self.queries = 0
+        self.sql_time = 0.0
+        self.template_time = 0.0
+        self.template_depth = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.total_time = 0.0
+
+    def add(self, other: 'Metrics') -> None:
+        self.queries += other.queries
+        self.sql_time += other.sql_time
+        self.template_time += other.template_time
+        self.cache_hits += other.cache_hits
+        self.cache_misses += other.cache_misses
+
+    def as_dict(self) -> dict:
+        return {
+            'queries': self.queries,
+            'sql_ms': round(self.sql_time * 1000, 2),
+            'template_ms': round(self.template_time * 1000, 2),
+            'cache_hits': self.cache_hits,
+            'cache_misses': self.cache_misses,
+            'total_ms': round(self.total_time * 1000, 2),
+        }
+
+    def server_timing(self) -> str:
+        return ', '.join((
+            f'sql;dur={self.sql_time * 1000:.2f};'
+            f'desc="{self.queries} queries"',
+            f'tpl;dur={self.template_time * 1000:.2f}',
+            f'cache;desc="{self.cache_hits} hits, '
+            f'{self.cache_misses} misses"',
+            f'total;dur={self.total_time * 1000:.2f}',
+        ))
+
+
+def count_query(execute, sql, params, many, context):
+    metrics = current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.queries += 1
+        metrics.sql_time += time.perf_counter() - start
+
+
+@contextmanager
+def collect_metrics():
+    '''
+    Собирает метрики кода внутри блока: with collect_metrics() as m.
+    Вложенный сбор (например, middleware внутри теста) добавляет свои
+    числа к внешнему.
+    '''
+    parent = current.get()
+    metrics = Metrics()
+    token = current.set(metrics)
+    start = time.perf_counter()
+    try:
+        with ExitStack() as stack:
+            # Обёртка ставится один раз: запросы считает текущий сбор.
+            if parent is None:
+                for connection in connections.all():
+                    stack.enter_context(
+                        connection.execute_wrapper(count_query))
+            yield metrics
+    finally:
+        metrics.total_time = time.perf_counter() - start
+        current.reset(token)
+        if parent is not None:
+            parent.add(metrics)
+
+
+@contextmanager
+def query_budget(max_queries: int, max_sql_ms: float = None):
+    '''Проваливает тест, если блок выполнил больше запросов, чем задано.'''
+    with collect_metrics() as metrics:
+        yield metrics
+    if metrics.queries > max_queries:
+        raise AssertionError(
+            f'{metrics.queries} SQL-запросов при бюджете {max_queries}')
+    if max_sql_ms is not None and metrics.sql_time * 1000 > max_sql_ms:
+        raise AssertionError(
+            f'SQL занял {metrics.sql_time * 1000:.1f} мс '
+            f'при бюджете {max_sql_ms} мс')
+
+
+def template_classes() -> list:
+    '''Классы шаблонов движков: Django и, если установлен, Jinja2.'''
+    classes = [Template]
+    try:
+        from django.template.backends.jinja2 import Template as Jinja2
+    except ImportError:
+        pass
+    else:
+        classes.append(Jinja2)
+    return classes
+
+
+def instrument_templates() -> None:
+    '''
+    Засекает время рендера шаблонов. Вложенные render() (шаблоны,
+    которые рендерят теги) входят во время внешнего и не считаются
+    повторно.
+    '''
+    for template_class in template_classes():
+        instrument_render(template_class)
+
+
+def instrument_render(template_class) -> None:
+    if getattr(template_class.render, 'instrumented', False):
+        return
+    render = template_class.render
+
+    def timed_render(self, context=None, request=None):
+        metrics = current.get()
+        if metrics is None:
+            return render(self, context, request)
+        metrics.template_depth += 1
+        start = time.perf_counter()
+        try:
+            return render(self, context, request)
+        finally:
+            metrics.template_depth -= 1
+            if not metrics.template_depth:
+                metrics.template_time += time.perf_counter() - start
+
+    timed_render.instrumented = True
+    template_class.render = timed_render
+
+
+class InstrumentedCacheMixin:
+    '''Считает попадания и промахи get и get_many.'''
+    _in_get_many = False
+
+    def get(self, key, default=None, version=None):
+        value = super().get(key, _MISSING, version)
+        if not self._in_get_many:
+            record_cache(hits=int(value is not _MISSING))
+        return default if value is _MISSING else value
+
+    def get_many(self, keys, version=None):
+        keys = list(keys)
+        # Экземпляры кэша свои у каждого потока, флаг не гоняется.
+        self._in_get_many = True
+        try:
+            found = super().get_many(keys, version)
+        finally:
+            self._in_get_many = False
+        record_cache(hits=len(found), total=len(keys))
+        return found
+
+
+def record_cache(hits: int, total: int = 1) -> None:
+    metrics = current.get()
+    if metrics is not None:
+        metrics.cache_hits += hits
+        metrics.cache_misses += total - hits
+
+
+class InstrumentedLocMemCache(InstrumentedCacheMixin, LocMemCache):
+    pass
+
+
+class InstrumentedMemcachedCache(InstrumentedCacheMixin, MemcachedCache):
+    pass
@@ -0,0 +1,79 @@
+import logging
+
+from django.conf import settings
+
+from .metrics import collect_metrics
+from .routers import pinned, replica_reads, wrote
+
+logger = logging.getLogger('yatube.metrics')
+
+PIN_COOKIE = 'primary_db'
+
+
+class MetricsMiddleware:
+    '''
+    Пишет в лог число SQL-запросов, время SQL и шаблонов, попадания
+    кэша для каждого запроса; при SERVER_TIMING отдаёт их в заголовке
+    Server-Timing, который видно во вкладке Network браузера.
+    '''
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with collect_metrics() as metrics:
+            response = self.get_response(request)
+        data = metrics.as_dict()
+        logger.info(
+            '%s %s %s %s', request.method, request.path,
+            response.status_code,
+            ' '.join(f'{key}={value}' for key, value in data.items()),
+            extra={
+                'method': request.method,
+                'path': request.path,
+                'status': response.status_code,
+                **data,
+            }
+        )
+        if settings.SERVER_TIMING:
+            response['Server-Timing'] = metrics.server_timing()
+        return response
+
+
+class ReplicaMiddleware:
+    '''
+    Разрешает чтение из реплик видам с use_replica. После записи
+    ставит cookie, и REPLICA_PIN_SECONDS секунд пользователь читает
+    основную базу — реплика могла ещё не получить его изменения.
+    '''
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        tokens = (
+            replica_reads.set(False),
+            pinned.set(PIN_COOKIE in request.COOKIES),
+            wrote.set(False),
+        )
+        try:
+            response = self.get_response(request)
+            if wrote.get():
+                response.set_cookie(
+                    PIN_COOKIE,
+                    '1',
+                    max_age=settings.REPLICA_PIN_SECONDS,
+                    httponly=True,
+                    samesite='Lax'
+                )
+        finally:
+            for var, token in zip((replica_reads, pinned, wrote), tokens):
+                var.reset(token)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if (
+            request.method in ('GET', 'HEAD')
+            and getattr(view_func, 'use_replica', False)
+        ):
+            replica_reads.set(True)
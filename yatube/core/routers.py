@@ -0,0 +1,50 @@
+'''
+Записи идут в основную базу, чтения помеченных видов — в реплики
+из DATABASE_REPLICAS. Состояние запроса выставляет ReplicaMiddleware.
+'''
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+# Чтения текущего запроса можно отправлять в реплику
+replica_reads = ContextVar('replica_reads', default=False)
+# Пользователь недавно писал: читаем только основную базу
+pinned = ContextVar('pinned', default=False)
+# В текущем запросе была запись
+wrote = ContextVar('wrote', default=False)
+
+
+def use_replica(view):
+    '''Помечает вид, чтения которого может обслужить реплика.'''
+    view.use_replica = True
+    return view
+
+
+def choose_replica() -> str:
+    return random.choice(settings.DATABASE_REPLICAS)
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if (
+            settings.DATABASE_REPLICAS
+            and replica_reads.get()
+            and not pinned.get()
+        ):
+            return choose_replica()
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        # Дальше в этом запросе читаем то, что только что записали.
+        pinned.set(True)
+        wrote.set(True)
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Реплики получают схему вместе с данными основной базы.
+        return db == DEFAULT_DB_ALIAS
@@ -0,0 +1,76 @@
+'''
+Прогрев шаблонов при старте. С кэширующим загрузчиком каждый шаблон
+разбирается один раз на процесс, и без прогрева это делают первые
+запросы после выкладки. warm_templates компилирует все шаблоны всех
+движков заранее и замеряет, сколько стоил разбор каждого.
+'''
+import os
+import time
+import warnings
+
+from django.template import engines
+
+
+def template_dirs(backend) -> list:
+    '''Каталоги, которые просматривают загрузчики движка.'''
+    engine = getattr(backend, 'engine', None)
+    loaders = getattr(engine, 'template_loaders', None)
+    if loaders is None:
+        return list(backend.template_dirs)
+    dirs = []
+    for loader in loaders:
+        # Кэширующий загрузчик держит настоящие в loaders
+        for inner in getattr(loader, 'loaders', [loader]):
+            if hasattr(inner, 'get_dirs'):
+                dirs.extend(str(directory) for directory in inner.get_dirs())
+    return dirs
+
+
+def template_names(backend) -> list:
+    names = []
+    for directory in template_dirs(backend):
+        for root, _, files in os.walk(directory):
+            for filename in files:
+                name = os.path.relpath(os.path.join(root, filename), directory)
+                names.append(name.replace(os.sep, '/'))
+    # Первый каталог перекрывает остальные, как при загрузке
+    return list(dict.fromkeys(names))
+
+
+def warm_templates(render: bool = False, prefix: str = '',
+                   using: str = None) -> list:
+    '''
+    Компилирует шаблоны и возвращает замеры: словари с именем, движком,
+    временем разбора и, при render, временем рендера с пустым
+    контекстом. using ограничивает прогрев одним движком. Ошибки
+    не прерывают прогрев, а попадают в error.
+    '''
+    results = []
+    for backend in engines.all():
+        if using and backend.name != using:
+            continue
+        for name in template_names(backend):
+            if not name.startswith(prefix):
+                continue
+            result = {
+                'engine': backend.name,
+                'name': name,
+                'compile': None,
+                'render': None,
+                'error': None,
+            }
+            results.append(result)
+            try:
+                start = time.perf_counter()
+                template = backend.get_template(name)
+                result['compile'] = time.perf_counter() - start
+                if render:
+                    start = time.perf_counter()
+                    with warnings.catch_warnings():
+                        # Без запроса нет csrf_token, это ожидаемо
+                        warnings.simplefilter('ignore')
+                        template.render({})
+                    result['render'] = time.perf_counter() - start
+            except Exception as error:
+                result['error'] = f'{type(error).__name__}: {error}'
+    return results
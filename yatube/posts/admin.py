@@ -1,6 +1,26 @@
-from django.contrib import admin
+import os
+import tempfile
 
+from django import forms
+from django.contrib import admin, messages
+from django.shortcuts import redirect
+from django.template.response import TemplateResponse
+from django.urls import path
+
+from .importing import Importer, ImportFailed
 from .models import Comment, Follow, Group, Post
+from .search import get_backend
+
+# Сколько ошибок импорта показывать в сообщении админки
+IMPORT_ERRORS_SHOWN = 20
+
+
+class ImportForm(forms.Form):
+    archive = forms.FileField(
+        label='NDJSON или tar-архив',
+        help_text='Строка: {"author": ..., "text": ..., "group": ..., '
+                  '"pub_date": ..., "image": ...}'
+    )
 
 
 @admin.register(Post)
@@ -16,6 +36,54 @@ class PostAdmin(admin.ModelAdmin):
     search_fields = ('text',)
     list_filter = ('pub_date',)
     empty_value_display = '-пусто-'
+    change_list_template = 'admin/posts/post/change_list.html'
+
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term:
+            return queryset, False
+        return get_backend().filter(queryset, search_term), False
+
+    def get_urls(self):
+        return [
+            path(
+                'import/',
+                self.admin_site.admin_view(self.import_view),
+                name='posts_post_import'
+            ),
+        ] + super().get_urls()
+
+    def import_view(self, request):
+        if not self.has_add_permission(request):
+            return redirect('admin:posts_post_changelist')
+        form = ImportForm(request.POST or None, request.FILES or None)
+        if form.is_valid():
+            upload = form.cleaned_data['archive']
+            suffix = os.path.splitext(upload.name)[1]
+            with tempfile.NamedTemporaryFile(suffix=suffix) as file:
+                for chunk in upload.chunks():
+                    file.write(chunk)
+                file.flush()
+                try:
+                    result = Importer(file.name).run()
+                except ImportFailed as error:
+                    messages.error(request, str(error))
+                    return redirect('admin:posts_post_import')
+            messages.success(
+                request,
+                f'Импортировано {result.imported}, '
+                f'пропущено {result.skipped}'
+            )
+            for number, reason in result.errors[:IMPORT_ERRORS_SHOWN]:
+                messages.warning(request, f'Строка {number}: {reason}')
+            return redirect('admin:posts_post_changelist')
+        context = {
+            **self.admin_site.each_context(request),
+            'opts': self.model._meta,
+            'form': form,
+            'title': 'Импорт постов',
+        }
+        return TemplateResponse(
+            request, 'admin/posts/post/import.html', context)
 
 
 admin.site.register(Group)
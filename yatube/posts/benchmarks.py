@@ -0,0 +1,301 @@
+'''
+Замеры видов через тестовый клиент Django, нагрузка — HTTP-запросами
+к WSGI-приложению на локальном сервере. Формат результатов повторяет
+JSON pytest-benchmark, чтобы прогоны разных коммитов можно было сравнить
+тем же инструментом или командой benchmark --compare.
+'''
+import json
+import platform
+import statistics
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from urllib.request import urlopen
+
+from django.core.cache import caches
+from django.core.servers.basehttp import (
+    ThreadedWSGIServer, WSGIRequestHandler
+)
+from django.db.models import Max, Min
+from django.template import engines
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from core.metrics import collect_metrics
+
+from .models import Group, Post, User
+from .pagination import encode_cursor
+
+
+class Benchmark:
+    def __init__(self, rounds: int = 5, warmup: int = 1):
+        self.rounds = rounds
+        self.warmup = warmup
+        self.results = []
+
+    def __call__(self, name: str, func, setup=None) -> dict:
+        '''Запускает func rounds раз; setup — перед каждым запуском.'''
+        for _ in range(self.warmup):
+            if setup:
+                setup()
+            func()
+        timings, queries, templates = [], [], []
+        for _ in range(self.rounds):
+            if setup:
+                setup()
+            with collect_metrics() as metrics:
+                start = time.perf_counter()
+                func()
+                timings.append(time.perf_counter() - start)
+            queries.append(metrics.queries)
+            templates.append(metrics.template_time)
+        result = {
+            'name': name,
+            'stats': {
+                'min': min(timings),
+                'max': max(timings),
+                'mean': statistics.mean(timings),
+                'median': statistics.median(timings),
+                'stddev': (
+                    statistics.stdev(timings) if len(timings) > 1 else 0.0),
+                'rounds': len(timings),
+            },
+            'extra_info': {
+                'queries': max(queries),
+                'template_ms': round(statistics.median(templates) * 1000, 3),
+            },
+        }
+        self.results.append(result)
+        return result
+
+    def as_json(self, **extra_info) -> dict:
+        return {
+            'machine_info': {
+                'node': platform.node(),
+                'python_version': platform.python_version(),
+                'machine': platform.machine(),
+            },
+            'commit_info': commit_info(),
+            'extra_info': extra_info,
+            'benchmarks': self.results,
+        }
+
+
+def commit_info() -> dict:
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', 'HEAD'],
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+        dirty = bool(subprocess.run(
+            ['git', 'status', '--porcelain', '--untracked-files=no'],
+            capture_output=True, text=True, check=True
+        ).stdout.strip())
+    except (OSError, subprocess.CalledProcessError):
+        return {}
+    return {'id': commit, 'dirty': dirty}
+
+
+def get_ok(client, url, **params):
+    def request():
+        response = client.get(url, params)
+        if response.status_code != 200:
+            raise AssertionError(f'{url}: {response.status_code}')
+    return request
+
+
+def run_views(bench: Benchmark) -> None:
+    '''Чтение лент и страниц поста, затем основные пути записи.'''
+    cache = caches['default']
+    posts = Post.objects.aggregate(first=Min('pk'), last=Max('pk'))
+    post = Post.objects.select_related('author').order_by(
+        '-comments_count').first()
+    # Самый популярный автор и самый активный читатель
+    author = User.objects.order_by('-counters__followers_count').first()
+    reader = User.objects.order_by('-counters__following_count').first()
+    group = Group.objects.order_by('-posts_count').first()
+    client = Client()
+    client.force_login(reader)
+
+    index = reverse('posts:index')
+    bench('index', get_ok(client, index))
+    bench('index (cold cache)', get_ok(client, index), setup=cache.clear)
+    total = Post.objects.count()
+    bench(
+        'index deep page',
+        get_ok(client, index, page=max(total // 10 // 2, 1)),
+        setup=cache.clear
+    )
+    middle = Post.objects.filter(
+        pk__gte=(posts['first'] + posts['last']) // 2).order_by('pk').first()
+    bench(
+        'index deep cursor',
+        get_ok(client, index, after=encode_cursor(middle.pub_date, middle.pk))
+    )
+    if group:
+        bench(
+            'group_posts',
+            get_ok(client, reverse('posts:group_list', args=(group.slug,))))
+    bench(
+        'profile',
+        get_ok(client, reverse('posts:profile', args=(author.username,)))
+    )
+    bench('follow_index', get_ok(client, reverse('posts:follow_index')))
+    detail = reverse('posts:post', args=(post.pk,))
+    bench('post_detail', get_ok(client, detail))
+    bench(
+        'post_detail (cold cache)', get_ok(client, detail), setup=cache.clear)
+
+    bench('post_create', lambda: client.post(
+        reverse('posts:post_create'), {'text': 'Замер создания поста'}))
+    bench('add_comment', lambda: client.post(
+        reverse('posts:add_comment', args=(post.pk,)),
+        {'text': 'Замер комментария'}))
+    own = reader.posts.first()
+    if own:
+        bench('post_edit', lambda: client.post(
+            reverse('posts:post_edit', args=(own.pk,)),
+            {'text': 'Замер правки поста'}))
+    username = post.author.username
+    if post.author != reader:
+        bench(
+            'follow + unfollow',
+            lambda: (
+                client.get(reverse('posts:profile_follow', args=(username,))),
+                client.get(
+                    reverse('posts:profile_unfollow', args=(username,))),
+            )
+        )
+
+
+def run_templates(bench: Benchmark) -> None:
+    '''
+    Ленты и страница поста на каждом движке шаблонов (POSTS_TEMPLATE_ENGINE).
+    Кэш сбрасывается перед каждым запуском, чтобы блоки статей
+    рендерились заново; сравнивать стоит template_ms.
+    '''
+    cache = caches['default']
+    post = Post.objects.order_by('-comments_count').first()
+    group = Group.objects.order_by('-posts_count').first()
+    pages = [('index', reverse('posts:index'))]
+    if group:
+        pages.append(
+            ('group_posts', reverse('posts:group_list', args=(group.slug,))))
+    pages.append(('post_detail', reverse('posts:post', args=(post.pk,))))
+    client = Client()
+    for backend in engines.all():
+        with override_settings(POSTS_TEMPLATE_ENGINE=backend.name):
+            for name, url in pages:
+                bench(
+                    f'{name} [{backend.name}]',
+                    get_ok(client, url),
+                    setup=cache.clear
+                )
+
+
+class QuietRequestHandler(WSGIRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+@contextmanager
+def serve_wsgi():
+    '''
+    Поднимает yatube.wsgi.application на многопоточном сервере wsgiref
+    (тот же, что у runserver) на свободном порту 127.0.0.1.
+    Отдаёт адрес сервера, после выхода из блока останавливает его.
+    '''
+    from yatube.wsgi import application
+
+    server = ThreadedWSGIServer(('127.0.0.1', 0), QuietRequestHandler)
+    server.set_app(application)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f'http://127.0.0.1:{server.server_port}'
+    finally:
+        server.shutdown()
+        server.server_close()
+        thread.join()
+
+
+def load_page(address: str, url: str, concurrency: int, total: int) -> dict:
+    '''
+    Нагрузка на сервер по address: concurrency потоков шлют в сумме
+    total HTTP-запросов к url. Возвращает запросы в секунду
+    и перцентили задержки одного запроса.
+    '''
+    latencies = []
+
+    def worker(count):
+        for _ in range(count):
+            start = time.perf_counter()
+            with urlopen(address + url) as response:
+                response.read()
+            latencies.append(time.perf_counter() - start)
+
+    shares = [
+        total // concurrency + (number < total % concurrency)
+        for number in range(concurrency)
+    ]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        list(pool.map(worker, shares))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        'url': url,
+        'concurrency': concurrency,
+        'requests': total,
+        'rps': round(total / elapsed, 1),
+        'p50_ms': round(statistics.median(latencies) * 1000, 2),
+        'p95_ms': round(
+            latencies[int(len(latencies) * 0.95) - 1] * 1000, 2),
+    }
+
+
+def run_load(concurrency: int, total: int = 200) -> list:
+    '''
+    Ленты и страница поста под нагрузкой на yatube.wsgi.application,
+    см. serve_wsgi и load_page. Страницы запрашиваются анонимно.
+    '''
+    cache = caches['default']
+    post = Post.objects.order_by('-comments_count').first()
+    author = User.objects.order_by('-counters__followers_count').first()
+    urls = (
+        reverse('posts:index'),
+        reverse('posts:profile', args=(author.username,)),
+        reverse('posts:post', args=(post.pk,)),
+    )
+    results = []
+    with serve_wsgi() as address:
+        for url in urls:
+            cache.clear()
+            results.append(load_page(address, url, concurrency, total))
+    return results
+
+
+def compare(current: dict, previous: dict) -> list:
+    '''Строки отчёта: изменение медианы и числа запросов по каждому замеру.'''
+    before = {item['name']: item for item in previous['benchmarks']}
+    lines = []
+    for item in current['benchmarks']:
+        old = before.get(item['name'])
+        if old is None:
+            continue
+        median, old_median = item['stats']['median'], old['stats']['median']
+        change = (median - old_median) / old_median * 100 if old_median else 0
+        lines.append(
+            f'{item["name"]:<28} {old_median * 1000:9.2f} мс -> '
+            f'{median * 1000:9.2f} мс ({change:+.1f}%), запросов '
+            f'{old["extra_info"]["queries"]} -> '
+            f'{item["extra_info"]["queries"]}'
+        )
+    return lines
+
+
+def load(path: str) -> dict:
+    with open(path, encoding='utf-8') as file:
+        return json.load(file)
@@ -0,0 +1,139 @@
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.paginator import Page
+from django.db import DEFAULT_DB_ALIAS
+from django.template.loader import get_template
+from django.utils.safestring import mark_safe
+
+from .pagination import (
+    CursorPage, CursorPaginator, ListingCount, WindowedPaginator
+)
+
+FEED_VERSION_KEY = 'feed:version'
+COMMENTS_VERSION_KEY = 'comments:version'
+
+
+def get_version(key: str) -> int:
+    '''Текущая версия данных, входит в ключи кэша и ETag.'''
+    cache = caches['default']
+    version = cache.get(key)
+    if version is None:
+        # Начинаем не с единицы: если ключ вытеснят из кэша,
+        # страницы старых версий не должны снова стать видимыми.
+        version = time.time_ns()
+        if not cache.add(key, version, None):
+            version = cache.get(key, version)
+    return version
+
+
+def bump_version(key: str) -> None:
+    cache = caches['default']
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns(), None)
+
+
+def feed_version() -> int:
+    '''Текущая версия ленты, входит в ключи закэшированных страниц.'''
+    return get_version(FEED_VERSION_KEY)
+
+
+def invalidate_feed() -> None:
+    '''Сбрасывает все закэшированные страницы ленты сменой версии.'''
+    bump_version(FEED_VERSION_KEY)
+
+
+def comments_version() -> int:
+    '''Меняется при любом добавлении или удалении комментария.'''
+    return get_version(COMMENTS_VERSION_KEY)
+
+
+def get_feed_page(posts, page_numb) -> Page:
+    '''
+    Страница главной ленты. Посты страницы и общее их число хранятся
+    в кэше до ближайшего изменения постов, групп или авторов.
+    '''
+    try:
+        number = int(page_numb)
+    except (TypeError, ValueError):
+        number = 1
+    cache = caches['default']
+    key = f'feed:{feed_version()}:{number}'
+    # Кэш заполняется из основной базы: отставшая реплика
+    # не должна оставить в нём страницу до следующего сброса.
+    pagin = WindowedPaginator(
+        posts.using(DEFAULT_DB_ALIAS), settings.LIMIT,
+        counter=ListingCount('index')
+    )
+    cached = cache.get(key)
+    if cached is None:
+        page = pagin.get_page(number)
+        cache.set(
+            key,
+            (page.number, pagin.count, pagin.estimated,
+             list(page.object_list)),
+            settings.FEED_CACHE_TIMEOUT
+        )
+        return page
+    number, count, estimated, object_list = cached
+    pagin.count, pagin.estimated = count, estimated
+    return pagin._get_page(object_list, number, pagin)
+
+
+def article_key(post, engine: str = 'django') -> str:
+    '''Ключ блока статьи меняется вместе с updated_at поста.'''
+    return (
+        f'article:{engine}:{post.pk}:'
+        f'{int(post.updated_at.timestamp() * 10**6)}'
+    )
+
+
+def cached_articles(posts, engine: str = 'django') -> list:
+    '''
+    Пары (пост, html includes/article.html) движка engine. Готовые блоки
+    страницы читаются из кэша одним get_many, недостающие сохраняются
+    set_many.
+    '''
+    cache = caches['default']
+    posts = list(posts)
+    keys = [article_key(post, engine) for post in posts]
+    fragments = cache.get_many(keys)
+    missing = {}
+    article = get_template('includes/article.html', using=engine)
+    for key, post in zip(keys, posts):
+        if key not in fragments:
+            fragments[key] = missing[key] = article.render({'post': post})
+    if missing:
+        cache.set_many(missing, settings.ARTICLE_CACHE_TIMEOUT)
+    return [
+        (post, mark_safe(fragments[key])) for key, post in zip(keys, posts)
+    ]
+
+
+def comments_key(post_id: int) -> str:
+    return f'comments:{post_id}:first'
+
+
+def get_comments_page(comments, post_id: int, after=None) -> CursorPage:
+    '''
+    Страница комментариев от новых к старым. Первая страница хранится
+    в кэше до следующего добавления или удаления комментария.
+    '''
+    pagin = CursorPaginator(comments, settings.COMMENTS_LIMIT, field='created')
+    if after:
+        return pagin.get_page(after=after)
+    cache = caches['default']
+    page = cache.get(comments_key(post_id))
+    if page is None:
+        page = pagin.get_page()
+        cache.set(
+            comments_key(post_id), page, settings.COMMENTS_CACHE_TIMEOUT)
+    return page
+
+
+def invalidate_comments(post_id: int) -> None:
+    caches['default'].delete(comments_key(post_id))
+    bump_version(COMMENTS_VERSION_KEY)
@@ -0,0 +1,104 @@
+'''
+Валидаторы для условных GET-запросов. ETag собирается из версии
+данных страницы, параметров запроса и пользователя (от него зависят
+шапка, кнопки подписки и форма комментария). Last-Modified отдаёт
+страница поста: самое позднее изменение поста и его комментариев.
+'''
+import hashlib
+from datetime import datetime
+from functools import wraps
+from typing import NamedTuple, Optional
+
+from django.db.models import Max
+from django.utils.http import urlencode
+from django.views.decorators.http import condition
+
+from .caching import feed_version
+from .models import Post, User
+from .timelines import timeline_post_ids
+
+
+def make_etag(request, *parts) -> str:
+    raw = '|'.join(str(part) for part in (
+        request.user.pk, urlencode(sorted(request.GET.items())), *parts))
+    return hashlib.md5(raw.encode()).hexdigest()
+
+
+class State(NamedTuple):
+    last_modified: Optional[datetime]
+    etag_parts: tuple
+    # Данные, которые вид берёт из состояния, чтобы не читать их дважды
+    data: Optional[dict] = None
+
+
+def conditional(state_func, *etag_prefix):
+    '''
+    Декоратор вида: state_func(request, **kwargs) возвращает State или
+    None, если страницы нет. Состояние считается один раз на запрос
+    и передаётся виду аргументом state.
+    '''
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            state = state_func(request, *args, **kwargs)
+
+            def etag(request, *args, **kwargs):
+                return state and make_etag(
+                    request, *etag_prefix, *state.etag_parts)
+
+            def last_modified(request, *args, **kwargs):
+                return state and state.last_modified
+
+            @condition(etag_func=etag, last_modified_func=last_modified)
+            def respond(request, *args, **kwargs):
+                return view(request, *args, state=state, **kwargs)
+            return respond(request, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def index_state(request):
+    # Версия ленты меняется при любой правке постов, групп и авторов,
+    # включая удаления, которых не видно по датам. Для списков её
+    # хватает, и ETag считается без запросов к базе.
+    return State(None, (feed_version(),))
+
+
+def group_state(request, slug):
+    return State(None, (feed_version(),))
+
+
+def profile_state(request, username):
+    # Подписки версию ленты не меняют, а профиль их показывает.
+    author = User.objects.filter(username=username).values(
+        'pk', 'counters__followers_count', 'counters__following_count'
+    ).first()
+    if author is None:
+        return None
+    following = (
+        request.user.is_authenticated
+        and request.user.follower.filter(author_id=author['pk']).exists())
+    return State(
+        None, (feed_version(), *author.values(), following),
+        {'following': following})
+
+
+def post_state(request, post_id):
+    post = Post.objects.filter(pk=post_id).order_by().values(
+        'updated_at',
+        'comments_count',
+        'author__counters__posts_count',
+        'group__title',
+    ).annotate(last_comment=Max('comments__created')).first()
+    if post is None:
+        return None
+    last_modified = max(filter(None, (
+        post['updated_at'], post['last_comment'])))
+    return State(last_modified, tuple(post.values()))
+
+
+def follow_state(request):
+    if not request.user.is_authenticated:
+        return None
+    post_ids = timeline_post_ids(request.user)
+    return State(None, (feed_version(), post_ids), {'post_ids': post_ids})
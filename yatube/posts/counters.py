@@ -0,0 +1,112 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import (Comment, Follow, Group, Post, StoredImage,
+                     UserCounters)
+
+User = get_user_model()
+
+
+def change_user_counters(user_id: int, **deltas) -> None:
+    '''Атомарно сдвигает счётчики пользователя: posts_count=1 и т.п.'''
+    updated = UserCounters.objects.filter(user_id=user_id).update(
+        **{field: F(field) + delta for field, delta in deltas.items()})
+    # Строки нет (пользователь создан в обход сигналов) — пересчитываем.
+    # При уменьшении не создаём: пользователь может как раз удаляться.
+    if not updated and min(deltas.values()) > 0:
+        rebuild_user_counters(user_id)
+
+
+def change_group_posts(group_id, delta: int) -> None:
+    if group_id is not None:
+        Group.objects.filter(pk=group_id).update(
+            posts_count=F('posts_count') + delta)
+
+
+def change_post_comments(post_id: int, delta: int) -> None:
+    Post.objects.filter(pk=post_id).update(
+        comments_count=F('comments_count') + delta)
+
+
+def change_image_references(deltas: dict) -> list:
+    '''
+    deltas: {имя файла картинки: изменение числа ссылок}. Возвращает
+    имена, для которых строка StoredImage создана заново.
+    '''
+    created = []
+    for name, delta in deltas.items():
+        if not name or not delta:
+            continue
+        updated = StoredImage.objects.filter(name=name).update(
+            references=F('references') + delta)
+        if not updated and delta > 0:
+            _, inserted = StoredImage.objects.get_or_create(
+                name=name, defaults={'references': delta})
+            if inserted:
+                created.append(name)
+    return created
+
+
+def rebuild_image_references() -> None:
+    StoredImage.objects.bulk_create(
+        (
+            StoredImage(name=name)
+            for name in Post.objects.exclude(image='').order_by()
+            .values_list('image', flat=True).distinct()
+        ),
+        ignore_conflicts=True
+    )
+    StoredImage.objects.update(references=count_of(Post, 'image', 'name'))
+
+
+def user_counters(user) -> UserCounters:
+    try:
+        return user.counters
+    except UserCounters.DoesNotExist:
+        return rebuild_user_counters(user.pk)
+
+
+def rebuild_user_counters(user_id: int) -> UserCounters:
+    counters, _ = UserCounters.objects.update_or_create(
+        user_id=user_id,
+        defaults={
+            'posts_count': Post.objects.filter(author_id=user_id).count(),
+            'followers_count': Follow.objects.filter(
+                author_id=user_id).count(),
+            'following_count': Follow.objects.filter(user_id=user_id).count(),
+        }
+    )
+    return counters
+
+
+def count_of(model, field: str, outer: str = 'pk'):
+    '''Подзапрос с числом строк model, ссылающихся на внешнюю строку.'''
+    return Coalesce(
+        Subquery(
+            model.objects.filter(**{field: OuterRef(outer)}).order_by()
+            .values(field).annotate(total=Count('pk')).values('total')
+        ),
+        0
+    )
+
+
+@transaction.atomic
+def rebuild_counters() -> None:
+    '''Пересчитывает все счётчики с нуля.'''
+    UserCounters.objects.bulk_create(
+        (
+            UserCounters(user_id=user_id)
+            for user_id in User.objects.filter(
+                counters__isnull=True).values_list('pk', flat=True)
+        )
+    )
+    UserCounters.objects.update(
+        posts_count=count_of(Post, 'author', 'user'),
+        followers_count=count_of(Follow, 'author', 'user'),
+        following_count=count_of(Follow, 'user', 'user'),
+    )
+    Group.objects.update(posts_count=count_of(Post, 'group'))
+    Post.objects.update(comments_count=count_of(Comment, 'post'))
+    rebuild_image_references()
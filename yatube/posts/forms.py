@@ -1,6 +1,9 @@
 from django import forms
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import UploadedFile
 
 from .models import Comment, Post
+from .uploads import check_upload, reencode
 
 
 class PostForm(forms.ModelForm):
@@ -19,6 +22,33 @@ class PostForm(forms.ModelForm):
             'image': 'Картинка поста'
         }
 
+    def full_clean(self):
+        # Лимиты проверяются до того, как forms.ImageField откроет файл
+        self.upload_error = None
+        upload = self.files.get('image')
+        if self.is_bound and upload:
+            try:
+                check_upload(upload)
+            except ValidationError as error:
+                self.upload_error = error
+                self.files = self.files.copy()
+                self.files.pop('image')
+        super().full_clean()
+
+    def clean_image(self):
+        if self.upload_error:
+            raise self.upload_error
+        image = self.cleaned_data['image']
+        if not isinstance(image, UploadedFile):
+            return image
+        try:
+            return reencode(image)
+        except (OSError, SyntaxError, ValueError) as error:
+            raise ValidationError(
+                self.fields['image'].error_messages['invalid_image'],
+                code='invalid_image'
+            ) from error
+
 
 class CommentForm(forms.ModelForm):
     class Meta:
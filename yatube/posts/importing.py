@@ -0,0 +1,288 @@
+'''
+Импорт постов из NDJSON или tar-архива с NDJSON и картинками.
+
+Строка NDJSON: {"author": "leo", "text": "...", "group": "cats",
+"pub_date": "2022-07-01T12:00:00+00:00", "image": "img/cat.jpg"}.
+Обязательны author и text; путь image ищется рядом с NDJSON или
+внутри архива. Посты вставляются пачками через bulk_create, после
+каждой пачки номер строки пишется в файл контрольной точки, и
+повторный запуск продолжает с места сбоя.
+'''
+import io
+import json
+import os
+import tarfile
+from collections import Counter
+from functools import partial
+
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from PIL import Image, UnidentifiedImageError
+
+from . import counters, thumbnails, timelines
+from .caching import invalidate_feed
+from .models import Group, Post
+from .search import get_backend
+from .seeding import batches, manual_dates
+
+User = get_user_model()
+
+BATCH_SIZE = 1000
+
+
+class ImportFailed(Exception):
+    pass
+
+
+class ImportResult:
+    def __init__(self, last_line: int = 0):
+        self.imported = 0
+        self.skipped = 0
+        # (номер строки, причина)
+        self.errors = []
+        self.last_line = last_line
+
+
+class Source:
+    '''Строки NDJSON и байты картинок из файла или tar-архива.'''
+
+    def __init__(self, path: str):
+        self.path = path
+        self.tar = None
+        if tarfile.is_tarfile(path):
+            self.tar = tarfile.open(path)
+            names = [
+                member.name for member in self.tar.getmembers()
+                if member.isfile() and member.name.endswith('.ndjson')
+            ]
+            if len(names) != 1:
+                raise ImportFailed('В архиве должен быть ровно один .ndjson')
+            self.ndjson = names[0]
+            self.root = os.path.dirname(self.ndjson)
+        else:
+            self.root = os.path.dirname(os.path.abspath(path))
+
+    def lines(self):
+        if self.tar is not None:
+            stream = io.TextIOWrapper(
+                self.tar.extractfile(self.ndjson), encoding='utf-8')
+        else:
+            stream = open(self.path, encoding='utf-8')
+        with stream:
+            yield from enumerate(stream, start=1)
+
+    def read_image(self, name: str) -> bytes:
+        path = os.path.normpath(os.path.join(self.root, name))
+        if self.tar is not None:
+            try:
+                return self.tar.extractfile(path).read()
+            except (KeyError, AttributeError):
+                raise ImportFailed(f'нет файла {name} в архиве')
+        if not path.startswith(self.root + os.sep):
+            raise ImportFailed(f'путь {name} вне каталога импорта')
+        try:
+            with open(path, 'rb') as file:
+                return file.read()
+        except OSError:
+            raise ImportFailed(f'нет файла {name}')
+
+    def close(self):
+        if self.tar is not None:
+            self.tar.close()
+
+
+def read_checkpoint(path, source: str) -> int:
+    '''Номер последней импортированной строки или 0.'''
+    if not path or not os.path.exists(path):
+        return 0
+    with open(path, encoding='utf-8') as file:
+        state = json.load(file)
+    if state['source'] != source:
+        raise ImportFailed(
+            f'Контрольная точка {path} относится к {state["source"]}')
+    return state['line']
+
+
+def write_checkpoint(path, source: str, line: int) -> None:
+    if not path:
+        return
+    temporary = f'{path}.tmp'
+    with open(temporary, 'w', encoding='utf-8') as file:
+        json.dump({'source': source, 'line': line}, file)
+    os.replace(temporary, path)
+
+
+def store_image(content: bytes, name: str) -> str:
+    '''
+    Сохраняет картинку в хранилище поля Post.image: оно называет файлы
+    по SHA-256 содержимого, и одинаковые картинки хранятся один раз.
+    '''
+    try:
+        with Image.open(io.BytesIO(content)) as image:
+            image.verify()
+            extension = image.format.lower()
+    except (UnidentifiedImageError, OSError, SyntaxError):
+        raise ImportFailed(f'{name} — не картинка')
+    field = Post._meta.get_field('image')
+    return field.storage.save(
+        f'{field.upload_to}image.{extension}', ContentFile(content))
+
+
+def author_id(record: dict, authors: dict) -> int:
+    author = record.get('author')
+    pk = authors.get(author) if isinstance(author, str) else None
+    if pk is None:
+        raise ImportFailed(f'нет автора {author}')
+    return pk
+
+
+def group_id(record: dict, groups: dict):
+    group = record.get('group')
+    if not group:
+        return None
+    pk = groups.get(group) if isinstance(group, str) else None
+    if pk is None:
+        raise ImportFailed(f'нет группы {group}')
+    return pk
+
+
+def pub_date(record: dict, now):
+    if not record.get('pub_date'):
+        return now
+    try:
+        value = parse_datetime(str(record['pub_date']))
+    except ValueError:
+        value = None
+    if value is None:
+        raise ImportFailed(f'неверная дата {record["pub_date"]}')
+    if timezone.is_naive(value):
+        value = timezone.make_aware(value)
+    return value
+
+
+class Importer:
+    def __init__(self, path: str, checkpoint: str = None,
+                 batch_size: int = BATCH_SIZE, progress=None):
+        self.path = path
+        self.checkpoint = checkpoint
+        self.batch_size = batch_size
+        # progress(result) вызывается после каждой пачки
+        self.progress = progress or (lambda result: None)
+
+    def run(self) -> ImportResult:
+        result = ImportResult(
+            last_line=read_checkpoint(self.checkpoint, self.path))
+        source = Source(self.path)
+        try:
+            lines = (
+                (number, line) for number, line in source.lines()
+                if number > result.last_line and line.strip()
+            )
+            for batch in batches(lines, self.batch_size):
+                self.import_batch(source, batch, result)
+                result.last_line = batch[-1][0]
+                write_checkpoint(self.checkpoint, self.path, result.last_line)
+                self.progress(result)
+        finally:
+            source.close()
+        return result
+
+    def parse(self, batch, result):
+        records = []
+        for number, line in batch:
+            try:
+                record = json.loads(line)
+                if not isinstance(record, dict):
+                    raise ValueError
+            except ValueError:
+                result.errors.append((number, 'строка не JSON-объект'))
+                continue
+            records.append((number, record))
+        usernames, slugs = set(), set()
+        for _, record in records:
+            if isinstance(record.get('author'), str):
+                usernames.add(record['author'])
+            if isinstance(record.get('group'), str):
+                slugs.add(record['group'])
+        authors = dict(User.objects.filter(
+            username__in=usernames).values_list('username', 'pk'))
+        groups = dict(Group.objects.filter(
+            slug__in=slugs).values_list('slug', 'pk'))
+        return records, authors, groups
+
+    def build_post(self, source, record, authors, groups, images, now):
+        text = record.get('text')
+        if not isinstance(text, str) or not text.strip():
+            raise ImportFailed('пустой text')
+        image = ''
+        if record.get('image'):
+            name = str(record['image'])
+            if name not in images:
+                images[name] = store_image(source.read_image(name), name)
+            image = images[name]
+        return Post(
+            author_id=author_id(record, authors),
+            group_id=group_id(record, groups),
+            text=text,
+            image=image,
+            pub_date=pub_date(record, now),
+            updated_at=now,
+        )
+
+    def import_batch(self, source, batch, result) -> None:
+        records, authors, groups = self.parse(batch, result)
+        images, posts, now = {}, [], timezone.now()
+        for number, record in records:
+            try:
+                posts.append(self.build_post(
+                    source, record, authors, groups, images, now))
+            except ImportFailed as error:
+                result.errors.append((number, str(error)))
+        result.skipped += len(batch) - len(posts)
+        if not posts:
+            return
+        with transaction.atomic():
+            with manual_dates(Post, 'pub_date', 'updated_at'):
+                created = Post.objects.bulk_create(posts)
+            if any(post.pk is None for post in created):
+                # SQLite не возвращает id из bulk_create. После первого
+                # INSERT транзакция держит блокировку записи, а id
+                # растут (AUTOINCREMENT), так что наши строки — последние
+                # len(created) по id, даже если кто-то писал до вставки.
+                ids = list(Post.objects.order_by('-pk').values_list(
+                    'pk', flat=True)[:len(created)])
+                for post, pk in zip(created, reversed(ids)):
+                    post.pk = pk
+            originals = {stored: name for name, stored in images.items()}
+
+            def read_image(stored):
+                return ContentFile(source.read_image(originals[stored]))
+            self.after_insert(created, read_image)
+        result.imported += len(created)
+
+    def after_insert(self, posts, read_image=None) -> None:
+        '''
+        То, что при обычном сохранении делают сигналы. read_image(имя)
+        нужен, если файл картинки придётся записать заново.
+        '''
+        for author_id, total in Counter(
+                post.author_id for post in posts).items():
+            counters.change_user_counters(author_id, posts_count=total)
+        for group_id, total in Counter(
+                post.group_id for post in posts).items():
+            counters.change_group_posts(group_id, total)
+        timelines.fan_out_many(posts)
+        backend = get_backend()
+        for post in posts:
+            backend.index(post)
+        images = Counter(post.image.name for post in posts if post.image)
+        for name in counters.change_image_references(images):
+            thumbnails.ensure_stored(
+                name, partial(read_image or (lambda stored: None), name))
+        for name in images:
+            transaction.on_commit(partial(thumbnails.submit, name))
+        invalidate_feed()
+        transaction.on_commit(invalidate_feed)
@@ -0,0 +1,81 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import benchmarks
+from posts.models import Post
+from posts.seeding import seed
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет основные виды через тестовый клиент и пишет результат '
+        'в JSON. Пишет в текущую базу: запускайте на отдельной копии.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--seed', action='store_true',
+            help='Сначала наполнить базу (размеры ниже)')
+        parser.add_argument('--users', type=int, default=100_000)
+        parser.add_argument('--posts', type=int, default=1_000_000)
+        parser.add_argument('--comments', type=int, default=5_000_000)
+        parser.add_argument('--follows', type=int, default=10_000_000)
+        parser.add_argument('--groups', type=int, default=100)
+        parser.add_argument('--rounds', type=int, default=5)
+        parser.add_argument(
+            '--output', default='benchmark.json', help='Файл результатов')
+        parser.add_argument(
+            '--compare', help='JSON прошлого прогона для сравнения')
+        parser.add_argument(
+            '--engines', action='store_true',
+            help='Ещё сравнить рендер лент движками Django и Jinja2')
+        parser.add_argument(
+            '--load', type=int, metavar='THREADS',
+            help='Ещё нагрузить WSGI-приложение на локальном сервере '
+                 'HTTP-запросами в THREADS потоков')
+        parser.add_argument(
+            '--load-requests', type=int, default=200,
+            help='Сколько запросов на страницу при --load')
+
+    def handle(self, *args, **options):
+        if options['seed']:
+            sizes = {
+                name: options[name]
+                for name in ('users', 'posts', 'comments', 'follows', 'groups')
+            }
+            self.stdout.write(f'Наполнение базы: {sizes}')
+            seed(**sizes)
+        if not Post.objects.exists():
+            raise CommandError('В базе нет постов: запустите с --seed')
+        bench = benchmarks.Benchmark(rounds=options['rounds'])
+        benchmarks.run_views(bench)
+        if options['engines']:
+            benchmarks.run_templates(bench)
+        extra_info = {'posts': Post.objects.count()}
+        if options['load']:
+            extra_info['load'] = benchmarks.run_load(
+                options['load'], options['load_requests'])
+        result = bench.as_json(**extra_info)
+        with open(options['output'], 'w', encoding='utf-8') as file:
+            json.dump(result, file, ensure_ascii=False, indent=2)
+        for item in result['benchmarks']:
+            stats = item['stats']
+            self.stdout.write(
+                f'{item["name"]:<28} медиана {stats["median"] * 1000:9.2f} мс'
+                f', шаблоны {item["extra_info"]["template_ms"]:8.2f} мс'
+                f', запросов {item["extra_info"]["queries"]}'
+            )
+        for item in result['extra_info'].get('load', ()):
+            self.stdout.write(
+                f'{item["url"]:<28} {item["rps"]:8.1f} запросов/с'
+                f' в {item["concurrency"]} потоков'
+                f', p50 {item["p50_ms"]:.2f} мс, p95 {item["p95_ms"]:.2f} мс'
+            )
+        if options['compare']:
+            self.stdout.write('Сравнение с ' + options['compare'])
+            for line in benchmarks.compare(
+                    result, benchmarks.load(options['compare'])):
+                self.stdout.write(line)
+        self.stdout.write(self.style.SUCCESS(
+            f'Результаты записаны в {options["output"]}'))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from posts.thumbnails import collect_garbage
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает ссылки на картинки постов и удаляет файлы '
+        'и миниатюры, на которые никто не ссылается'
+    )
+
+    def handle(self, *args, **options):
+        removed = collect_garbage()
+        for name in removed:
+            self.stdout.write(name)
+        self.stdout.write(self.style.SUCCESS(
+            f'Удалено картинок: {len(removed)}'))
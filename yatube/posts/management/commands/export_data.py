@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.export import (
+    EXPORTS, FORMATS, ExportError, export_lines, export_rows
+)
+
+
+class Command(BaseCommand):
+    help = 'Выгружает посты, комментарии, подписки или группы в NDJSON/CSV'
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=EXPORTS)
+        parser.add_argument('--format', choices=FORMATS, default='ndjson')
+        parser.add_argument('--author', help='username автора')
+        parser.add_argument('--group', help='slug группы')
+        parser.add_argument('--since', help='с даты, YYYY-MM-DD или ISO 8601')
+        parser.add_argument('--until', help='по дату включительно')
+        parser.add_argument(
+            '--output', default='-', help='Файл; по умолчанию stdout')
+
+    def handle(self, *args, **options):
+        try:
+            columns, rows = export_rows(
+                options['kind'],
+                author=options['author'],
+                group=options['group'],
+                since=options['since'],
+                until=options['until'],
+            )
+        except ExportError as error:
+            raise CommandError(error)
+        lines = export_lines(options['format'], columns, rows)
+        if options['output'] == '-':
+            for line in lines:
+                self.stdout.write(line, ending='')
+            return
+        with open(options['output'], 'w', encoding='utf-8',
+                  newline='') as file:
+            file.writelines(lines)
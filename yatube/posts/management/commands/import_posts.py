@@ -0,0 +1,43 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.importing import BATCH_SIZE, Importer, ImportFailed
+
+
+class Command(BaseCommand):
+    help = (
+        'Импортирует посты из NDJSON или tar-архива с NDJSON и картинками. '
+        'С --checkpoint повторный запуск продолжает с места сбоя.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument(
+            '--checkpoint', help='Файл с номером последней принятой строки')
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+
+        def progress(result):
+            seconds = time.perf_counter() - started
+            self.stdout.write(
+                f'строка {result.last_line}: импортировано '
+                f'{result.imported} ({result.imported / seconds:,.0f}/с), '
+                f'пропущено {result.skipped}'
+            )
+
+        try:
+            result = Importer(
+                options['path'],
+                checkpoint=options['checkpoint'],
+                batch_size=options['batch_size'],
+                progress=progress,
+            ).run()
+        except ImportFailed as error:
+            raise CommandError(error)
+        for number, reason in result.errors:
+            self.stderr.write(f'строка {number}: {reason}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Импортировано {result.imported}, пропущено {result.skipped}'))
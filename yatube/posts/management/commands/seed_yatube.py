@@ -0,0 +1,61 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts.seeding import BATCH_SIZE, seed
+
+
+class Command(BaseCommand):
+    help = (
+        'Наполняет базу фейковыми пользователями, группами, постами, '
+        'комментариями и подписками для нагрузочных прогонов'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--groups', type=int, default=20)
+        parser.add_argument('--posts', type=int, default=10_000)
+        parser.add_argument('--comments', type=int, default=50_000)
+        parser.add_argument('--follows', type=int, default=20_000)
+        parser.add_argument(
+            '--images', type=float, default=0.0,
+            help='Доля постов с картинкой, от 0 до 1')
+        parser.add_argument(
+            '--follow-exponent', type=float, default=1.0,
+            help='Показатель степенного закона подписок, 0 — равномерно')
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+        parser.add_argument(
+            '--seed', type=int, default=0,
+            help='Зерно генератора: одинаковое зерно — одинаковые данные')
+
+    def progress(self, model, inserted, seconds):
+        rate = inserted / seconds if seconds else 0
+        self.stdout.write(
+            f'\r{model._meta.verbose_name_plural}: {inserted} '
+            f'({rate:,.0f} строк/с)',
+            ending=''
+        )
+        self.stdout.flush()
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        sizes = seed(
+            users=options['users'],
+            groups=options['groups'],
+            posts=options['posts'],
+            comments=options['comments'],
+            follows=options['follows'],
+            image_share=options['images'],
+            follow_exponent=options['follow_exponent'],
+            seed=options['seed'],
+            batch_size=options['batch_size'],
+            progress=self.progress,
+        )
+        seconds = time.perf_counter() - started
+        rows = sum(sizes.values())
+        self.stdout.write('')
+        self.stdout.write(self.style.SUCCESS(
+            f'Вставлено {rows} строк за {seconds:.1f} с '
+            f'({rows / seconds:,.0f} строк/с с учётом пересборки '
+            f'счётчиков, лент и поиска)'
+        ))
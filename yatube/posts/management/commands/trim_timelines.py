@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from posts.timelines import trim_timelines
+
+
+class Command(BaseCommand):
+    help = (
+        'Удаляет из лент подписок записи старше последних '
+        'FEED_TIMELINE_SIZE; запускайте по расписанию'
+    )
+
+    def handle(self, *args, **options):
+        deleted = trim_timelines()
+        self.stdout.write(self.style.SUCCESS(
+            f'Удалено записей лент: {deleted}'))
@@ -0,0 +1,74 @@
+# Generated by Django 2.2.16 on 2026-10-18 05:48
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+def fill_timelines(apps, schema_editor):
+    # Те же правила, что у rebuild_timelines: авторы больше чем
+    # с FEED_FANOUT_LIMIT подписчиков в ленты не раскладываются,
+    # в ленте последние FEED_TIMELINE_SIZE постов. Счётчиков подписчиков
+    # ещё нет, их считаем по подпискам.
+    entry, follow, post = (
+        apps.get_model('posts', name)._meta.db_table
+        for name in ('TimelineEntry', 'Follow', 'Post')
+    )
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            f'''
+            INSERT INTO {entry} (user_id, post_id, author_id, pub_date)
+            SELECT user_id, post_id, author_id, pub_date FROM (
+                SELECT f.user_id, p.id AS post_id, p.author_id, p.pub_date,
+                       ROW_NUMBER() OVER (
+                           PARTITION BY f.user_id
+                           ORDER BY p.pub_date DESC, p.id DESC
+                       ) AS position
+                FROM {follow} f
+                JOIN {post} p ON p.author_id = f.author_id
+                WHERE f.author_id NOT IN (
+                    SELECT author_id FROM {follow}
+                    GROUP BY author_id
+                    HAVING COUNT(*) > %s
+                )
+            ) ranked
+            WHERE position <= %s
+            ''',
+            [settings.FEED_FANOUT_LIMIT, settings.FEED_TIMELINE_SIZE]
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0020_auto_20220709_1230'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TimelineEntry',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('pub_date', models.DateTimeField(verbose_name='Дата публикации')),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='timeline_entries', to='posts.Post')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='timeline', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ('-pub_date',),
+            },
+        ),
+        migrations.AddIndex(
+            model_name='timelineentry',
+            index=models.Index(fields=['user', '-pub_date'], name='timeline_user_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='timelineentry',
+            index=models.Index(fields=['user', 'author'], name='timeline_user_author_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='timelineentry',
+            constraint=models.UniqueConstraint(fields=('user', 'post'), name='unique_timeline_entry'),
+        ),
+        migrations.RunPython(fill_timelines, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,40 @@
+from django.db import migrations
+
+from posts.stemmer import stem_words
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        Post = apps.get_model('posts', 'Post')
+        schema_editor.execute(
+            'CREATE VIRTUAL TABLE posts_post_fts USING fts5(text)')
+        for pk, text in Post.objects.values_list('pk', 'text').iterator():
+            schema_editor.execute(
+                'INSERT INTO posts_post_fts(rowid, text) VALUES (%s, %s)',
+                [pk, ' '.join(stem_words(text))]
+            )
+    elif vendor == 'postgresql':
+        schema_editor.execute(
+            'CREATE INDEX posts_post_text_search_idx ON posts_post '
+            "USING gin (to_tsvector('russian'::regconfig, COALESCE(text, '')))"
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        schema_editor.execute('DROP TABLE posts_post_fts')
+    elif vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX posts_post_text_search_idx')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0023_listing_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -1,6 +1,8 @@
 from django.contrib.auth import get_user_model
 from django.db import models
 
+from .storage import ContentAddressedStorage
+
 User = get_user_model()
 
 POST_TEXT_LIMIT: int = 15
@@ -10,6 +12,8 @@ class Group(models.Model):
     title = models.CharField('Название группы', max_length=200)
     slug = models.SlugField('url-адрес', unique=True)
     description = models.TextField('Описание группы')
+    posts_count = models.PositiveIntegerField(
+        'Число постов', default=0, editable=False)
 
     class Meta:
         ordering = ('title',)
@@ -37,6 +41,7 @@ class Post(models.Model):
     image = models.ImageField(
         'Картинка',
         upload_to='posts/',
+        storage=ContentAddressedStorage(),
         blank=True
     )
     pub_date = models.DateTimeField(
@@ -44,15 +49,37 @@ class Post(models.Model):
         db_index=True,
         auto_now_add=True
     )
+    updated_at = models.DateTimeField('Дата изменения', auto_now=True)
+    comments_count = models.PositiveIntegerField(
+        'Число комментариев', default=0, editable=False)
 
     class Meta:
         verbose_name = 'Пост',
         verbose_name_plural = 'Посты'
         ordering = ('-pub_date',)
+        indexes = [
+            models.Index(
+                fields=['author', '-pub_date', '-id'],
+                name='post_author_date_idx'),
+            models.Index(
+                fields=['group', '-pub_date', '-id'],
+                name='post_group_date_idx'),
+        ]
 
     def __str__(self) -> str:
         return self.text[:POST_TEXT_LIMIT]
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Нужна счётчикам групп, когда пост переносят в другую группу.
+        instance._loaded_group_id = instance.__dict__.get(
+            'group_id', models.DEFERRED)
+        # Нужна счётчику ссылок на картинку, когда её заменяют.
+        instance._loaded_image = instance.__dict__.get(
+            'image', models.DEFERRED)
+        return instance
+
 
 class Comment(models.Model):
     post = models.ForeignKey(
@@ -72,6 +99,11 @@ class Comment(models.Model):
         verbose_name = 'Комментарий',
         verbose_name_plural = 'Комментарии'
         ordering = ('-created',)
+        indexes = [
+            models.Index(
+                fields=['post', '-created', '-id'],
+                name='comment_post_created_idx'),
+        ]
 
 
 class Follow(models.Model):
@@ -95,3 +127,70 @@ class Follow(models.Model):
                 name='follow_himself'
             ),
         ]
+        indexes = [
+            models.Index(
+                fields=['author', 'user'], name='follow_author_user_idx'),
+        ]
+
+
+class UserCounters(models.Model):
+    """Счётчики пользователя, поддерживаемые сигналами моделей."""
+    user = models.OneToOneField(
+        User,
+        related_name='counters',
+        on_delete=models.CASCADE
+    )
+    posts_count = models.PositiveIntegerField('Число постов', default=0)
+    followers_count = models.PositiveIntegerField(
+        'Число подписчиков', default=0)
+    following_count = models.PositiveIntegerField('Число подписок', default=0)
+
+    class Meta:
+        verbose_name = 'Счётчики пользователя'
+        verbose_name_plural = 'Счётчики пользователей'
+
+
+class TimelineEntry(models.Model):
+    """Пост в заранее собранной ленте подписчика."""
+    user = models.ForeignKey(
+        User,
+        related_name='timeline',
+        on_delete=models.CASCADE
+    )
+    post = models.ForeignKey(
+        Post,
+        related_name='timeline_entries',
+        on_delete=models.CASCADE
+    )
+    author = models.ForeignKey(
+        User,
+        related_name='+',
+        on_delete=models.CASCADE
+    )
+    pub_date = models.DateTimeField('Дата публикации')
+
+    class Meta:
+        ordering = ('-pub_date',)
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'post'], name='unique_timeline_entry'),
+        ]
+        indexes = [
+            models.Index(
+                fields=['user', '-pub_date'], name='timeline_user_date_idx'),
+            models.Index(
+                fields=['user', 'author'], name='timeline_user_author_idx'),
+        ]
+
+
+class StoredImage(models.Model):
+    """Файл картинки и число постов, которые на него ссылаются."""
+    name = models.CharField('Имя файла', max_length=100, unique=True)
+    references = models.IntegerField('Число ссылок', default=0)
+
+    class Meta:
+        verbose_name = 'Файл картинки'
+        verbose_name_plural = 'Файлы картинок'
+
+    def __str__(self) -> str:
+        return self.name
@@ -0,0 +1,201 @@
+import base64
+import binascii
+from collections.abc import Sequence
+from datetime import datetime
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.paginator import Page, Paginator
+from django.utils.functional import cached_property
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+def encode_cursor(value: datetime, pk: int) -> str:
+    '''Непрозрачный токен позиции в ленте: значение поля сортировки и pk.'''
+    raw = f'{value.isoformat()}|{pk}'.encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(token: str):
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        value, pk = raw.decode().split('|')
+        return datetime.fromisoformat(value), int(pk)
+    except (ValueError, binascii.Error, UnicodeDecodeError):
+        raise InvalidCursor(token)
+
+
+class WindowedPaginator(Paginator):
+    '''
+    Paginator, который для навигации отдаёт не все номера страниц,
+    а первую, последнюю и окно вокруг текущей. Если число объектов
+    оценено (estimated), последних страниц не показываем: их номера
+    неточны.
+    '''
+    ELLIPSIS = '…'
+    estimated = False
+
+    def __init__(self, *args, counter=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        # counter(object_list) -> (число объектов, оценено ли оно)
+        self.counter = counter
+
+    @cached_property
+    def count(self):
+        if self.counter is None:
+            return super().count
+        count, self.estimated = self.counter(self.object_list)
+        return count
+
+    def _get_page(self, *args, **kwargs):
+        # Тип страницы остаётся Page: окно кладётся атрибутом.
+        page = Page(*args, **kwargs)
+        page.page_window = self.get_elided_page_range(page.number)
+        return page
+
+    def get_elided_page_range(self, number=1, on_each_side=None,
+                              on_ends=1) -> list:
+        '''
+        Как Paginator.get_elided_page_range из Django 3.2: номера
+        страниц с ELLIPSIS на месте пропусков. Окно — PAGINATION_WINDOW
+        страниц с каждой стороны от текущей.
+        '''
+        if on_each_side is None:
+            on_each_side = settings.PAGINATION_WINDOW
+        number = self.validate_number(number)
+        last = self.num_pages
+        if last <= (on_each_side + on_ends) * 2 and not self.estimated:
+            return list(self.page_range)
+        pages = []
+        if number > on_each_side + on_ends + 2:
+            pages.extend(range(1, on_ends + 1))
+            pages.append(self.ELLIPSIS)
+            pages.extend(range(number - on_each_side, number + 1))
+        else:
+            pages.extend(range(1, number + 1))
+        end = min(number + on_each_side, last)
+        pages.extend(range(number + 1, end + 1))
+        if self.estimated:
+            if end < last:
+                pages.append(self.ELLIPSIS)
+        elif end < last - on_ends - 1:
+            pages.append(self.ELLIPSIS)
+            pages.extend(range(last - on_ends + 1, last + 1))
+        else:
+            pages.extend(range(end + 1, last + 1))
+        return pages
+
+
+class ListingCount:
+    '''
+    Число объектов ленты для WindowedPaginator без COUNT(*) на больших
+    лентах. known — поддерживаемый счётчик (Group.posts_count и т.п.):
+    от PAGINATION_EXACT_COUNT_LIMIT он берётся вместо COUNT(*). Без
+    счётчика COUNT(*) большой ленты кэшируется по ключу key на
+    PAGINATION_COUNT_TIMEOUT секунд и до истечения считается оценкой.
+    '''
+
+    def __init__(self, key: str, known: int = None):
+        self.key = key
+        self.known = known
+
+    def __call__(self, queryset) -> tuple:
+        limit = settings.PAGINATION_EXACT_COUNT_LIMIT
+        if self.known is not None:
+            if self.known >= limit:
+                return self.known, False
+            return queryset.count(), False
+        cache = caches['default']
+        key = f'count:{self.key}'
+        count = cache.get(key)
+        if count is not None:
+            return count, True
+        count = queryset.count()
+        if count >= limit:
+            cache.set(key, count, settings.PAGINATION_COUNT_TIMEOUT)
+        return count, False
+
+
+class CursorPage(Sequence):
+    '''Страница курсорной пагинации, совместимая с шаблонами Page.'''
+    is_cursor = True
+
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __repr__(self):
+        return f'<CursorPage of {len(self.object_list)} objects>'
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class CursorPaginator:
+    '''
+    Пагинация по ключу (field, pk) вместо COUNT(*) и OFFSET:
+    любая страница стоит столько же, сколько первая.
+    '''
+
+    def __init__(self, object_list, per_page, field='pub_date'):
+        self.object_list = object_list
+        self.per_page = per_page
+        self.field = field
+
+    def get_page(self, after=None, before=None) -> CursorPage:
+        position = None
+        if before or after:
+            try:
+                position = decode_cursor(before or after)
+            except InvalidCursor:
+                before = None
+        field = self.field
+        posts = self.object_list
+        if position and before:
+            value, pk = position
+            posts = posts.filter(**{f'{field}__gte': value}).exclude(
+                **{field: value, 'pk__lte': pk}
+            ).order_by(field, 'pk')
+        else:
+            if position:
+                value, pk = position
+                posts = posts.filter(**{f'{field}__lte': value}).exclude(
+                    **{field: value, 'pk__gte': pk})
+            posts = posts.order_by(f'-{field}', '-pk')
+        rows = list(posts[:self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if position and before:
+            rows.reverse()
+            has_next, has_previous = True, has_more
+        else:
+            has_next, has_previous = has_more, position is not None
+        if not rows:
+            return CursorPage(rows)
+        return CursorPage(
+            rows,
+            next_cursor=self.cursor(rows[-1]) if has_next else None,
+            previous_cursor=self.cursor(rows[0]) if has_previous else None,
+        )
+
+    def cursor(self, obj) -> str:
+        # Строки .values() приходят словарями с ключом id
+        if isinstance(obj, dict):
+            return encode_cursor(obj[self.field], obj['id'])
+        return encode_cursor(getattr(obj, self.field), obj.pk)
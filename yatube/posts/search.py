@@ -0,0 +1,174 @@
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import connection
+from django.db.models.expressions import RawSQL
+from django.utils.html import escape
+from django.utils.module_loading import import_string
+from django.utils.safestring import mark_safe
+
+from .models import Post
+from .stemmer import WORD_RE, stem, stem_words
+
+FTS_TABLE = 'posts_post_fts'
+SNIPPET_WORDS = 30
+
+
+class SearchBackend:
+    '''Полнотекстовый поиск по постам.'''
+
+    def index(self, post) -> None:
+        pass
+
+    def remove(self, post_id: int) -> None:
+        pass
+
+    def rebuild(self) -> None:
+        pass
+
+    def filter(self, queryset, query: str):
+        '''Посты queryset, подходящие под запрос, без ранжирования.'''
+        raise NotImplementedError
+
+    def search(self, query: str):
+        '''
+        Посты по убыванию релевантности. Результат понимает count()
+        и срезы, поэтому его можно передать в Paginator.
+        '''
+        raise NotImplementedError
+
+
+class RankedResults:
+    '''Ленивая выдача FTS5: каждый срез — один запрос с LIMIT/OFFSET.'''
+
+    def __init__(self, match: str):
+        self.match = match
+
+    def count(self) -> int:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT count(*) FROM {FTS_TABLE} '
+                f'WHERE {FTS_TABLE} MATCH %s',
+                [self.match]
+            )
+            return cursor.fetchone()[0]
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+        offset = index.start or 0
+        limit = index.stop - offset
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s '
+                f'ORDER BY rank LIMIT %s OFFSET %s',
+                [self.match, limit, offset]
+            )
+            post_ids = [row[0] for row in cursor.fetchall()]
+        posts = Post.objects.select_related('author', 'group').in_bulk(
+            post_ids)
+        return [posts[pk] for pk in post_ids if pk in posts]
+
+
+class SQLiteFTSBackend(SearchBackend):
+    '''
+    Виртуальная таблица FTS5 с основами слов: русской морфологии
+    в SQLite нет, поэтому текст стеммится на стороне Python.
+    '''
+
+    def index(self, post) -> None:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'INSERT OR REPLACE INTO {FTS_TABLE}(rowid, text) '
+                f'VALUES (%s, %s)',
+                [post.pk, ' '.join(stem_words(post.text))]
+            )
+
+    def remove(self, post_id: int) -> None:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [post_id])
+
+    def rebuild(self) -> None:
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE}')
+        for post in Post.objects.only('text').iterator():
+            self.index(post)
+
+    @staticmethod
+    def match(query: str) -> str:
+        return ' '.join(
+            '"{}"'.format(word.replace('"', '""'))
+            for word in stem_words(query)
+        )
+
+    def filter(self, queryset, query: str):
+        return queryset.filter(pk__in=RawSQL(
+            f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s',
+            [self.match(query)]
+        ))
+
+    def search(self, query: str):
+        match = self.match(query)
+        return RankedResults(match) if match else Post.objects.none()
+
+
+class PostgresSearchBackend(SearchBackend):
+    '''tsvector с русским словарём; GIN-индекс создаёт миграция.'''
+    config = 'russian'
+
+    def vector(self):
+        from django.contrib.postgres.search import SearchVector
+        return SearchVector('text', config=self.config)
+
+    def query(self, query: str):
+        from django.contrib.postgres.search import SearchQuery
+        return SearchQuery(query, config=self.config)
+
+    def filter(self, queryset, query: str):
+        return queryset.annotate(search=self.vector()).filter(
+            search=self.query(query))
+
+    def search(self, query: str):
+        from django.contrib.postgres.search import SearchRank
+        return self.filter(
+            Post.objects.select_related('author', 'group'), query
+        ).annotate(
+            rank=SearchRank(self.vector(), self.query(query))
+        ).order_by('-rank', '-pub_date')
+
+
+@lru_cache(maxsize=None)
+def get_backend() -> SearchBackend:
+    return import_string(settings.POSTS_SEARCH_BACKEND)()
+
+
+def highlight(text: str, query: str) -> str:
+    '''
+    Фрагмент текста вокруг первого совпадения; слова с той же основой,
+    что и слова запроса, выделены <mark>.
+    '''
+    stems = set(stem_words(query))
+    words = list(WORD_RE.finditer(text))
+    if not words:
+        return escape(text)
+    hits = [
+        index for index, word in enumerate(words)
+        if stem(word.group()) in stems
+    ]
+    first = max(hits[0] - SNIPPET_WORDS // 3, 0) if hits else 0
+    last = min(first + SNIPPET_WORDS, len(words))
+    start = words[first].start() if first else 0
+    end = words[last - 1].end() if last < len(words) else len(text)
+    parts = ['…'] if start else []
+    position = start
+    for index in hits:
+        if first <= index < last:
+            word = words[index]
+            parts.append(escape(text[position:word.start()]))
+            parts.append(f'<mark>{escape(word.group())}</mark>')
+            position = word.end()
+    parts.append(escape(text[position:end]))
+    if end < len(text):
+        parts.append('…')
+    return mark_safe(''.join(parts))
@@ -0,0 +1,277 @@
+'''
+Быстрое наполнение базы фейковыми данными для нагрузочных прогонов.
+Строки вставляются пачками через bulk_create, сигналы не срабатывают,
+поэтому счётчики, ленты подписок и поисковый индекс пересобираются
+в конце одним проходом.
+'''
+import io
+import random
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+from itertools import accumulate, islice
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.db import connection, transaction
+from django.utils import timezone
+from faker import Faker
+from PIL import Image
+
+from .caching import invalidate_feed
+from .counters import rebuild_counters
+from .models import Comment, Follow, Group, Post
+from .search import get_backend
+from .timelines import rebuild_timelines
+
+User = get_user_model()
+
+BATCH_SIZE = 5000
+# Faker медленный для миллионов строк: тексты берутся из пула
+TEXT_POOL_SIZE = 2000
+# Картинки тоже из пула: посты ссылаются на одни и те же файлы
+IMAGE_POOL_SIZE = 50
+IMAGE_SIZE = (960, 540)
+# Настройки SQLite на время загрузки: WAL, без fsync, временное — в памяти
+BULK_LOAD_PRAGMAS = (
+    ('journal_mode', 'WAL'),
+    ('synchronous', 'OFF'),
+    ('temp_store', 'MEMORY'),
+    ('cache_size', '-200000'),
+)
+
+
+@contextmanager
+def bulk_load_pragmas():
+    '''Ускоряет массовую вставку в SQLite и возвращает прежние настройки.'''
+    # Внутри транзакции SQLite не даёт менять журнал и synchronous.
+    if connection.vendor != 'sqlite' or connection.in_atomic_block:
+        yield
+        return
+    with connection.cursor() as cursor:
+        saved = []
+        for name, value in BULK_LOAD_PRAGMAS:
+            cursor.execute(f'PRAGMA {name}')
+            saved.append((name, cursor.fetchone()[0]))
+            cursor.execute(f'PRAGMA {name} = {value}')
+    try:
+        yield
+    finally:
+        with connection.cursor() as cursor:
+            for name, value in saved:
+                cursor.execute(f'PRAGMA {name} = {value}')
+
+
+@contextmanager
+def manual_dates(model, *names):
+    '''Отключает auto_now/auto_now_add, чтобы вставить свои даты.'''
+    fields = [model._meta.get_field(name) for name in names]
+    saved = [(field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, (auto_now, auto_now_add) in zip(fields, saved):
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def batches(rows, size: int):
+    rows = iter(rows)
+    while True:
+        batch = list(islice(rows, size))
+        if not batch:
+            return
+        yield batch
+
+
+class Seeder:
+    def __init__(self, seed: int = 0, batch_size: int = BATCH_SIZE,
+                 progress=None):
+        self.random = random.Random(seed)
+        self.faker = Faker('ru_RU')
+        self.faker.seed_instance(seed)
+        self.batch_size = batch_size
+        # progress(model, inserted, seconds) вызывается после каждой пачки
+        self.progress = progress or (lambda model, inserted, seconds: None)
+        self.prefix = f'seed{seed}_'
+        self._texts = None
+
+    def texts(self) -> list:
+        if self._texts is None:
+            self._texts = [
+                self.faker.paragraph(nb_sentences=3)
+                for _ in range(TEXT_POOL_SIZE)
+            ]
+        return self._texts
+
+    def images(self, count: int) -> list:
+        '''Пул однотонных JPEG в хранилище; возвращает имена файлов.'''
+        storage = Post._meta.get_field('image').storage
+        names = []
+        for number in range(count):
+            color = tuple(self.random.randrange(256) for _ in range(3))
+            buffer = io.BytesIO()
+            Image.new('RGB', IMAGE_SIZE, color).save(buffer, 'JPEG')
+            names.append(storage.save(
+                f'posts/{self.prefix}{number}.jpg',
+                ContentFile(buffer.getvalue())
+            ))
+        return names
+
+    def insert(self, model, rows, ignore_conflicts=False) -> int:
+        inserted = 0
+        start = time.perf_counter()
+        for batch in batches(rows, self.batch_size):
+            with transaction.atomic():
+                model.objects.bulk_create(
+                    batch, ignore_conflicts=ignore_conflicts)
+            inserted += len(batch)
+            self.progress(model, inserted, time.perf_counter() - start)
+        return inserted
+
+    def users(self, count: int) -> list:
+        password = make_password(None)
+        start = User.objects.filter(
+            username__startswith=self.prefix).count()
+        self.insert(User, (
+            User(
+                username=f'{self.prefix}{number}',
+                first_name=self.faker.first_name(),
+                last_name=self.faker.last_name(),
+                password=password,
+            )
+            for number in range(start, start + count)
+        ))
+        return list(User.objects.filter(
+            username__startswith=self.prefix).values_list('pk', flat=True))
+
+    def groups(self, count: int) -> list:
+        self.insert(Group, (
+            Group(
+                title=self.faker.catch_phrase()[:200],
+                slug=f'{self.prefix.replace("_", "-")}{number}',
+                description=self.faker.paragraph(),
+            )
+            for number in range(count)
+        ), ignore_conflicts=True)
+        return list(Group.objects.filter(
+            slug__startswith=self.prefix.replace('_', '-')
+        ).values_list('pk', flat=True))
+
+    def posts(self, count: int, user_ids: list, group_ids=(),
+              images=(), image_share: float = 0.0, days: int = 365) -> int:
+        '''
+        Посты равномерно за последние days дней, от старых к новым;
+        доля image_share из них с картинкой из images.
+        '''
+        texts = self.texts()
+        now = timezone.now()
+        step = timedelta(days=days) / max(count, 1)
+        groups = list(group_ids) + [None]
+
+        def rows():
+            for number in range(count):
+                pub_date = now - step * (count - number)
+                yield Post(
+                    author_id=self.random.choice(user_ids),
+                    group_id=self.random.choice(groups),
+                    text=self.random.choice(texts),
+                    image=(
+                        self.random.choice(images)
+                        if images and self.random.random() < image_share
+                        else ''
+                    ),
+                    pub_date=pub_date,
+                    updated_at=pub_date,
+                )
+        with manual_dates(Post, 'pub_date', 'updated_at'):
+            return self.insert(Post, rows())
+
+    def comments(self, count: int, post_range, user_ids: list) -> int:
+        texts = self.texts()
+        first, last = post_range
+        now = timezone.now()
+        with manual_dates(Comment, 'created'):
+            return self.insert(Comment, (
+                Comment(
+                    post_id=self.random.randint(first, last),
+                    author_id=self.random.choice(user_ids),
+                    text=self.random.choice(texts),
+                    created=now - timedelta(
+                        seconds=self.random.randint(0, 365 * 24 * 3600)),
+                )
+                for _ in range(count)
+            ))
+
+    def follows(self, count: int, user_ids: list,
+                exponent: float = 1.0) -> int:
+        '''
+        Граф подписок со степенным распределением: вес автора номер k
+        равен 1 / k ** exponent, так что у немногих авторов миллионы
+        подписчиков, а у большинства — единицы. exponent=0 даёт
+        равномерный граф. Повторы и подписки на себя отбрасываются.
+        '''
+        authors = list(user_ids)
+        self.random.shuffle(authors)
+        weights = list(accumulate(
+            1 / (rank ** exponent) for rank in range(1, len(authors) + 1)))
+
+        def rows():
+            chunk = self.batch_size
+            for offset in range(0, count, chunk):
+                size = min(chunk, count - offset)
+                chosen = self.random.choices(
+                    authors, cum_weights=weights, k=size)
+                for author_id in chosen:
+                    user_id = self.random.choice(user_ids)
+                    if user_id != author_id:
+                        yield Follow(user_id=user_id, author_id=author_id)
+        return self.insert(Follow, rows(), ignore_conflicts=True)
+
+    def finish(self) -> None:
+        '''Пересобирает то, что обычно поддерживают сигналы.'''
+        rebuild_counters()
+        rebuild_timelines()
+        get_backend().rebuild()
+        invalidate_feed()
+
+
+def table_sizes() -> dict:
+    return {
+        name: model.objects.count()
+        for name, model in (
+            ('users', User), ('groups', Group), ('posts', Post),
+            ('comments', Comment), ('follows', Follow))
+    }
+
+
+def seed(users: int, posts: int, comments: int, follows: int,
+         groups: int = 0, image_share: float = 0.0,
+         follow_exponent: float = 1.0, seed: int = 0,
+         batch_size: int = BATCH_SIZE, progress=None) -> dict:
+    '''
+    Наполняет базу и возвращает, сколько строк каждой таблицы добавилось
+    на самом деле: повторные подписки и группы отбрасываются.
+    '''
+    seeder = Seeder(seed=seed, batch_size=batch_size, progress=progress)
+    before = table_sizes()
+    with bulk_load_pragmas():
+        user_ids = seeder.users(users)
+        group_ids = seeder.groups(groups) if groups else []
+        images = seeder.images(IMAGE_POOL_SIZE) if image_share else []
+        first_post = (Post.objects.order_by('-pk').values_list(
+            'pk', flat=True).first() or 0) + 1
+        seeder.posts(posts, user_ids, group_ids, images, image_share)
+        last_post = Post.objects.order_by('-pk').values_list(
+            'pk', flat=True).first() or 0
+        if comments and last_post >= first_post:
+            seeder.comments(comments, (first_post, last_post), user_ids)
+        if follows and len(user_ids) > 1:
+            seeder.follows(follows, user_ids, follow_exponent)
+        seeder.finish()
+    return {
+        name: count - before[name]
+        for name, count in table_sizes().items()
+    }
@@ -0,0 +1,182 @@
+import threading
+from functools import partial
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import DEFERRED
+from django.db.models.signals import (
+    post_delete, post_init, post_save, pre_delete, pre_save
+)
+from django.dispatch import receiver
+from django.utils import timezone
+
+from . import counters, search, thumbnails, timelines
+from .caching import invalidate_comments, invalidate_feed
+from .models import Comment, Follow, Group, Post, UserCounters
+
+User = get_user_model()
+
+# id постов, которые удаляются в этом потоке вместе с комментариями
+_deleting = threading.local()
+
+
+def feed_changed() -> None:
+    invalidate_feed()
+    # Повторный сброс после коммита: иначе параллельный запрос мог
+    # успеть закэшировать страницу по ещё не закоммиченным данным.
+    transaction.on_commit(invalidate_feed)
+
+
+@receiver([post_save, post_delete], sender=Post)
+@receiver([post_save, post_delete], sender=Group)
+@receiver(post_delete, sender=User)
+def content_changed(sender, **kwargs):
+    feed_changed()
+
+
+# Поля пользователя, которые выводятся в блоке статьи
+AUTHOR_FIELDS = ('username', 'first_name', 'last_name')
+
+
+def author_names(user) -> tuple:
+    return tuple(
+        user.__dict__.get(name, DEFERRED) for name in AUTHOR_FIELDS)
+
+
+@receiver(post_init, sender=User)
+def author_loaded(sender, instance, **kwargs):
+    instance._loaded_names = author_names(instance)
+
+
+@receiver(post_save, sender=User)
+def author_changed(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        UserCounters.objects.get_or_create(user=instance)
+    names = author_names(instance)
+    renamed = names != getattr(instance, '_loaded_names', None)
+    instance._loaded_names = names
+    # Вход, смена пароля или прав ленту не меняют.
+    if not created and not renamed:
+        return
+    if not created:
+        # Имя автора выводится в блоке статьи: сбрасываем их кэш.
+        instance.posts.update(updated_at=timezone.now())
+    feed_changed()
+
+
+@receiver(post_save, sender=Post)
+def post_published(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        timelines.fan_out(instance)
+    thumbnails.schedule(instance.image)
+    search.get_backend().index(instance)
+
+
+@receiver(post_save, sender=Post)
+def post_counters(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        counters.change_user_counters(instance.author_id, posts_count=1)
+        counters.change_group_posts(instance.group_id, 1)
+    else:
+        loaded_group_id = getattr(instance, '_loaded_group_id', DEFERRED)
+        if (loaded_group_id is not DEFERRED
+                and loaded_group_id != instance.group_id):
+            counters.change_group_posts(loaded_group_id, -1)
+            counters.change_group_posts(instance.group_id, 1)
+    instance._loaded_group_id = instance.group_id
+
+
+def image_references_changed(deltas: dict, content=None) -> None:
+    for name in counters.change_image_references(deltas):
+        thumbnails.ensure_stored(name, lambda: content)
+    released = [
+        name for name, delta in deltas.items() if name and delta < 0]
+    if released:
+        transaction.on_commit(partial(thumbnails.release, released))
+
+
+@receiver(pre_save, sender=Post)
+def post_image_uploading(sender, instance, **kwargs):
+    # После сохранения в поле остаётся только имя, а загруженное
+    # содержимое нужно, если файл придётся записать заново.
+    image = instance.image
+    instance._image_content = None if image._committed else image.file
+
+
+@receiver(post_save, sender=Post)
+def post_image_changed(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    name = instance.image.name or ''
+    content = getattr(instance, '_image_content', None)
+    instance._image_content = None
+    if created:
+        image_references_changed({name: 1}, content)
+    else:
+        loaded_image = getattr(instance, '_loaded_image', DEFERRED)
+        if loaded_image is not DEFERRED and loaded_image != name:
+            image_references_changed({loaded_image: -1, name: 1}, content)
+    instance._loaded_image = name
+
+
+def deleting_posts() -> set:
+    if not hasattr(_deleting, 'post_ids'):
+        _deleting.post_ids = set()
+    return _deleting.post_ids
+
+
+@receiver(pre_delete, sender=Post)
+def post_deleting(sender, instance, **kwargs):
+    # Каскад удаляет комментарии раньше поста: их счётчик и кэш
+    # у удаляемого поста обновлять незачем.
+    deleting_posts().add(instance.pk)
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    deleting_posts().discard(instance.pk)
+    comments_changed(instance.pk)
+    search.get_backend().remove(instance.pk)
+    counters.change_user_counters(instance.author_id, posts_count=-1)
+    counters.change_group_posts(instance.group_id, -1)
+    image_references_changed({instance.image.name or '': -1})
+
+
+def comments_changed(post_id: int) -> None:
+    invalidate_comments(post_id)
+    transaction.on_commit(lambda: invalidate_comments(post_id))
+
+
+@receiver(post_save, sender=Comment)
+def comment_added(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        counters.change_post_comments(instance.post_id, 1)
+    comments_changed(instance.post_id)
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    if instance.post_id in deleting_posts():
+        return
+    counters.change_post_comments(instance.post_id, -1)
+    comments_changed(instance.post_id)
+
+
+@receiver(post_save, sender=Follow)
+def author_followed(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        counters.change_user_counters(instance.author_id, followers_count=1)
+        counters.change_user_counters(instance.user_id, following_count=1)
+        timelines.backfill(instance.user_id, instance.author_id)
+
+
+@receiver(post_delete, sender=Follow)
+def author_unfollowed(sender, instance, **kwargs):
+    counters.change_user_counters(instance.author_id, followers_count=-1)
+    counters.change_user_counters(instance.user_id, following_count=-1)
+    timelines.prune(instance.user_id, instance.author_id)
+    timelines.follower_removed(instance.author_id)
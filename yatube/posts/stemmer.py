@@ -0,0 +1,140 @@
+'''
+Стеммер русского языка по алгоритму Snowball:
+https://snowballstem.org/algorithms/russian/stemmer.html
+'''
+import re
+
+VOWELS = 'аеиоуыэюя'
+
+PERFECTIVE_GERUND = (
+    ('вшись', 'вши', 'в'),
+    ('ившись', 'ывшись', 'ивши', 'ывши', 'ив', 'ыв'),
+)
+ADJECTIVE = (
+    'ими', 'ыми', 'его', 'ого', 'ему', 'ому', 'ее', 'ие', 'ые', 'ое', 'ей',
+    'ий', 'ый', 'ой', 'ем', 'им', 'ым', 'ом', 'их', 'ых', 'ую', 'юю', 'ая',
+    'яя', 'ою', 'ею',
+)
+PARTICIPLE = (
+    ('ем', 'нн', 'вш', 'ющ', 'щ'),
+    ('ивш', 'ывш', 'ующ'),
+)
+REFLEXIVE = ('ся', 'сь')
+VERB = (
+    (
+        'ла', 'на', 'ете', 'йте', 'ли', 'й', 'л', 'ем', 'н', 'ло', 'но', 'ет',
+        'ют', 'ны', 'ть', 'ешь', 'нно',
+    ),
+    (
+        'ила', 'ыла', 'ена', 'ейте', 'уйте', 'ите', 'или', 'ыли', 'ей', 'уй',
+        'ил', 'ыл', 'им', 'ым', 'ен', 'ило', 'ыло', 'ено', 'ят', 'ует', 'уют',
+        'ит', 'ыт', 'ены', 'ить', 'ыть', 'ишь', 'ую', 'ю',
+    ),
+)
+NOUN = (
+    'иями', 'ями', 'ами', 'ией', 'иям', 'ием', 'иях', 'ев', 'ов', 'ие', 'ье',
+    'еи', 'ии', 'ей', 'ой', 'ий', 'ям', 'ем', 'ам', 'ом', 'ах', 'ях', 'ию',
+    'ью', 'ия', 'ья', 'а', 'е', 'и', 'й', 'о', 'у', 'ы', 'ь', 'ю', 'я',
+)
+SUPERLATIVE = ('ейше', 'ейш')
+DERIVATIONAL = ('ость', 'ост')
+
+WORD_RE = re.compile(r'\w+')
+
+
+def _longest(word: str, endings) -> str:
+    matches = [ending for ending in endings if word.endswith(ending)]
+    return max(matches, key=len) if matches else ''
+
+
+def _remove(word: str, endings):
+    '''Отрезает самое длинное окончание; None, если ни одно не подошло.'''
+    ending = _longest(word, endings)
+    return word[:-len(ending)] if ending else None
+
+
+def _remove_grouped(word: str, groups):
+    '''
+    Берётся самое длинное окончание из обеих групп; окончание первой
+    группы отрезается, только если перед ним стоит «а» или «я».
+    '''
+    ending = _longest(word, groups[0] + groups[1])
+    if not ending:
+        return None
+    stem = word[:-len(ending)]
+    if ending not in groups[1] and stem[-1:] not in ('а', 'я'):
+        return None
+    return stem
+
+
+def _regions(word: str):
+    '''Начала областей RV и R2 по правилам Snowball.'''
+    rv = len(word)
+    for index, letter in enumerate(word):
+        if letter in VOWELS:
+            rv = index + 1
+            break
+    r1 = len(word)
+    for index in range(1, len(word)):
+        if word[index - 1] in VOWELS and word[index] not in VOWELS:
+            r1 = index + 1
+            break
+    r2 = len(word)
+    for index in range(r1 + 1, len(word)):
+        if word[index - 1] in VOWELS and word[index] not in VOWELS:
+            r2 = index + 1
+            break
+    return rv, r2
+
+
+def _step1(rv_part: str) -> str:
+    '''Окончания деепричастий, прилагательных, глаголов и существительных.'''
+    result = _remove_grouped(rv_part, PERFECTIVE_GERUND)
+    if result is not None:
+        return result
+    without_reflexive = _remove(rv_part, REFLEXIVE)
+    if without_reflexive is not None:
+        rv_part = without_reflexive
+    result = _remove(rv_part, ADJECTIVE)
+    if result is not None:
+        participle = _remove_grouped(result, PARTICIPLE)
+        return result if participle is None else participle
+    result = _remove_grouped(rv_part, VERB)
+    if result is None:
+        result = _remove(rv_part, NOUN)
+    return rv_part if result is None else result
+
+
+def _step3(rv_part: str, start: int, r2: int) -> str:
+    '''Словообразовательные суффиксы отрезаются только в R2.'''
+    ending = _longest(rv_part, DERIVATIONAL)
+    if ending and start + len(rv_part) - len(ending) >= r2:
+        return rv_part[:-len(ending)]
+    return rv_part
+
+
+def _step4(rv_part: str) -> str:
+    if rv_part.endswith('нн'):
+        return rv_part[:-1]
+    result = _remove(rv_part, SUPERLATIVE)
+    if result is not None:
+        return result[:-1] if result.endswith('нн') else result
+    if rv_part.endswith('ь'):
+        return rv_part[:-1]
+    return rv_part
+
+
+def stem(word: str) -> str:
+    word = word.lower().replace('ё', 'е')
+    rv, r2 = _regions(word)
+    prefix, rv_part = word[:rv], word[rv:]
+    rv_part = _step1(rv_part)
+    # Шаг 2
+    if rv_part.endswith('и'):
+        rv_part = rv_part[:-1]
+    rv_part = _step3(rv_part, len(prefix), r2)
+    return prefix + _step4(rv_part)
+
+
+def stem_words(text: str) -> list:
+    return [stem(word) for word in WORD_RE.findall(text.lower())]
@@ -0,0 +1,36 @@
+'''
+Хранилище картинок постов с именами по SHA-256 содержимого. Одинаковые
+загрузки ложатся в один файл, и sorl находит для него уже готовые
+миниатюры. Число ссылающихся постов хранит StoredImage, а файл без
+ссылок удаляет thumbnails.release вместе с миниатюрами.
+'''
+import hashlib
+import os
+import posixpath
+
+from django.core.files.base import File
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+
+def content_name(name: str, content) -> str:
+    '''Имя файла из хэша содержимого; каталог и расширение — из name.'''
+    digest = hashlib.sha256()
+    for chunk in content.chunks():
+        digest.update(chunk)
+    content.seek(0)
+    directory = posixpath.dirname(name)
+    extension = os.path.splitext(name)[1].lower()
+    return posixpath.join(directory, digest.hexdigest() + extension)
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    def save(self, name, content, max_length=None):
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        name = content_name(name, content)
+        # Такой файл уже есть — он побайтно тот же, пишем только ссылку.
+        if self.exists(name):
+            return name
+        return super().save(name, content, max_length)
@@ -0,0 +1,11 @@
+from django import template
+
+from .. import caching
+
+register = template.Library()
+
+
+@register.simple_tag
+def cached_articles(posts):
+    '''Пары (пост, html блока статьи), см. caching.cached_articles.'''
+    return caching.cached_articles(posts)
@@ -0,0 +1,14 @@
+from django import template
+
+from ..thumbnails import post_variants
+
+register = template.Library()
+
+
+@register.inclusion_tag('includes/picture.html')
+def post_picture(post):
+    '''
+    <picture> с WebP/JPEG разных ширин; пока производных нет,
+    показывается оригинал, а их создание уходит в фоновый пул.
+    '''
+    return {'image': post.image, 'variants': post_variants(post)}
@@ -0,0 +1,56 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.core.cache import caches
+from django.core.management import call_command
+from django.test import TransactionTestCase
+
+from ..models import Comment, Follow, Post, TimelineEntry, UserCounters
+
+
+class BenchmarkCommandTest(TransactionTestCase):
+    # Нагрузка идёт через сервер в других потоках: им видны только
+    # закоммиченные данные
+    def setUp(self) -> None:
+        caches['default'].clear()
+
+    def test_seed_and_benchmark(self):
+        '''Наполнение пачками и замер пишут JSON с каждым видом'''
+        with tempfile.TemporaryDirectory() as directory:
+            output = os.path.join(directory, 'bench.json')
+            call_command(
+                'benchmark', '--seed', '--users', '20', '--posts', '60',
+                '--comments', '100', '--follows', '80', '--groups', '3',
+                '--rounds', '1', '--output', output, stdout=StringIO()
+            )
+            with open(output, encoding='utf-8') as file:
+                result = json.load(file)
+            call_command(
+                'benchmark', '--rounds', '1', '--output', output,
+                '--compare', output, '--engines', '--load', '1',
+                '--load-requests', '3', stdout=StringIO()
+            )
+            with open(output, encoding='utf-8') as file:
+                second = json.load(file)
+            engines = {
+                item['name']: item['extra_info']
+                for item in second['benchmarks']
+            }
+        self.assertGreater(engines['index [django]']['template_ms'], 0)
+        load = second['extra_info']['load']
+        self.assertEqual(len(load), 3)
+        self.assertTrue(all(item['rps'] > 0 for item in load))
+        names = {item['name'] for item in result['benchmarks']}
+        self.assertTrue(
+            {'index', 'profile', 'follow_index', 'post_detail',
+             'post_create', 'add_comment'} <= names)
+        self.assertGreaterEqual(Comment.objects.count(), 100)
+        self.assertGreater(Follow.objects.count(), 0)
+        counters = UserCounters.objects.get(
+            user=Post.objects.order_by('pk').first().author)
+        self.assertEqual(
+            counters.posts_count,
+            Post.objects.filter(author=counters.user).count())
+        self.assertTrue(TimelineEntry.objects.exists())
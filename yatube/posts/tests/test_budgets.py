@@ -0,0 +1,68 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from core.metrics import collect_metrics, query_budget
+
+from ..models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class QueryBudgetTest(TestCase):
+    '''Число SQL-запросов видов не растёт вместе с числом постов'''
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='leo')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='группа', slug='group', description='описание')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        posts = [
+            Post.objects.create(
+                author=cls.author, group=cls.group, text=f'пост {number}')
+            for number in range(12)
+        ]
+        cls.post = posts[-1]
+        for number in range(5):
+            commenter = User.objects.create_user(username=f'user{number}')
+            Comment.objects.create(
+                post=cls.post, author=commenter, text='комментарий')
+
+    def setUp(self) -> None:
+        self.client = Client()
+        self.client.force_login(self.reader)
+        caches['default'].clear()
+
+    def test_view_budgets(self):
+        budgets = (
+            (reverse('posts:index'), 4),
+            (reverse('posts:group_list', args=(self.group.slug,)), 5),
+            (reverse('posts:profile', args=(self.author.username,)), 7),
+            (reverse('posts:post', args=(self.post.pk,)), 5),
+            (reverse('posts:follow_index'), 6),
+        )
+        for url, max_queries in budgets:
+            with self.subTest(url=url):
+                with query_budget(max_queries):
+                    self.assertEqual(self.client.get(url).status_code, 200)
+
+    def test_server_timing(self):
+        '''Метрики запроса попадают в заголовок Server-Timing'''
+        with self.settings(SERVER_TIMING=True):
+            response = self.client.get(reverse('posts:index'))
+        self.assertIn('sql;dur=', response['Server-Timing'])
+        self.assertIn('tpl;dur=', response['Server-Timing'])
+
+    def test_cache_hits_counted(self):
+        with collect_metrics() as metrics:
+            self.client.get(reverse('posts:index'))
+        misses = metrics.cache_misses
+        self.assertGreater(misses, 0)
+        with collect_metrics() as metrics:
+            self.client.get(reverse('posts:index'))
+        self.assertLess(metrics.cache_misses, misses)
+        self.assertGreater(metrics.cache_hits, 0)
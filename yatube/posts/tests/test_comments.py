@@ -0,0 +1,66 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..models import Comment, Post
+
+User = get_user_model()
+
+
+@override_settings(COMMENTS_LIMIT=3)
+class CommentPaginationTest(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='leo')
+        cls.post = Post.objects.create(author=cls.user, text='текст')
+        for number in range(5):
+            Comment.objects.create(
+                post=cls.post, author=cls.user, text=f'комментарий {number}')
+
+    def setUp(self) -> None:
+        self.client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+        caches['default'].clear()
+
+    def test_first_page_and_fragment(self):
+        '''На странице поста первые комментарии, остальные — фрагментом'''
+        response = self.client.get(reverse('posts:post', args=(self.post.pk,)))
+        comments = response.context['comments']
+        self.assertEqual(
+            [comment.text for comment in comments],
+            ['комментарий 4', 'комментарий 3', 'комментарий 2']
+        )
+        response = self.client.get(
+            reverse('posts:comments', args=(self.post.pk,)),
+            {'after': comments.next_cursor, 'format': 'json'}
+        )
+        data = response.json()
+        self.assertEqual(
+            [comment['text'] for comment in data['comments']],
+            ['комментарий 1', 'комментарий 0']
+        )
+        self.assertIsNone(data['next'])
+        response = self.client.get(
+            reverse('posts:comments', args=(self.post.pk,)),
+            {'after': comments.next_cursor}
+        )
+        self.assertContains(response, 'комментарий 0')
+        self.assertNotContains(response, 'Показать ещё')
+
+    def test_first_page_cached_until_comment(self):
+        '''Первая страница из кэша, новый комментарий её сбрасывает'''
+        url = reverse('posts:post', args=(self.post.pk,))
+        self.client.get(url)
+        # ETag и сам пост; комментарии берутся из кэша
+        with self.assertNumQueries(2):
+            self.client.get(url)
+        self.authorized_client.post(
+            reverse('posts:add_comment', args=(self.post.pk,)),
+            {'text': 'свежий комментарий'}
+        )
+        response = self.client.get(url)
+        self.assertEqual(
+            response.context['comments'][0].text, 'свежий комментарий')
@@ -0,0 +1,74 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class ConditionalGetTest(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='leo')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='группа', slug='group', description='описание')
+        cls.post = Post.objects.create(
+            author=cls.author, group=cls.group, text='текст')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self) -> None:
+        self.client = Client()
+        self.client.force_login(self.reader)
+        caches['default'].clear()
+
+    def urls(self):
+        return (
+            reverse('posts:index'),
+            reverse('posts:group_list', args=(self.group.slug,)),
+            reverse('posts:profile', args=(self.author.username,)),
+            reverse('posts:post', args=(self.post.pk,)),
+            reverse('posts:follow_index'),
+        )
+
+    def test_not_modified(self):
+        '''Повторный запрос с ETag получает 304 без рендера шаблона'''
+        for url in self.urls():
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+                response = self.client.get(
+                    url, HTTP_IF_NONE_MATCH=response['ETag'])
+                self.assertEqual(response.status_code, 304)
+                self.assertFalse(response.templates)
+
+    def test_etag_changes_with_content(self):
+        '''Правка поста меняет ETag всех страниц, где он виден'''
+        etags = [self.client.get(url)['ETag'] for url in self.urls()]
+        self.post.text = 'новый текст'
+        self.post.save()
+        for url, etag in zip(self.urls(), etags):
+            with self.subTest(url=url):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 200)
+
+    def test_etag_depends_on_page_user_and_comments(self):
+        '''ETag учитывает номер страницы, пользователя и комментарии'''
+        url = reverse('posts:post', args=(self.post.pk,))
+        etag = self.client.get(url)['ETag']
+        self.assertNotEqual(self.client.get(url, {'page': 2})['ETag'], etag)
+        self.assertNotEqual(Client().get(url)['ETag'], etag)
+        Comment.objects.create(post=self.post, author=self.reader, text='к')
+        self.assertNotEqual(self.client.get(url)['ETag'], etag)
+
+    def test_last_modified(self):
+        '''Страница поста отдаёт Last-Modified'''
+        url = reverse('posts:post', args=(self.post.pk,))
+        response = self.client.get(url)
+        self.assertIn('Last-Modified', response)
+        response = self.client.get(
+            url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(response.status_code, 304)
@@ -0,0 +1,106 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from ..models import Comment, Follow, Group, Post, UserCounters
+
+User = get_user_model()
+
+
+class CountersTest(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='leo')
+        cls.follower = User.objects.create_user(username='Mao')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.other_group = Group.objects.create(
+            title='Test group 2',
+            slug='test-slug-2',
+            description='test description',
+        )
+
+    def assertCounters(self, user, posts=0, followers=0, following=0):
+        counters = UserCounters.objects.get(user=user)
+        self.assertEqual(
+            (posts, followers, following),
+            (counters.posts_count, counters.followers_count,
+             counters.following_count)
+        )
+
+    def test_post_counters(self):
+        '''Счётчики постов автора и группы следуют за постами'''
+        post = Post.objects.create(
+            author=self.user, group=self.group, text='test')
+        self.assertCounters(self.user, posts=1)
+        self.group.refresh_from_db()
+        self.assertEqual(self.group.posts_count, 1)
+        post = Post.objects.get(pk=post.pk)
+        post.group = self.other_group
+        post.save()
+        self.group.refresh_from_db()
+        self.other_group.refresh_from_db()
+        self.assertEqual(self.group.posts_count, 0)
+        self.assertEqual(self.other_group.posts_count, 1)
+        post.delete()
+        self.assertCounters(self.user)
+        self.other_group.refresh_from_db()
+        self.assertEqual(self.other_group.posts_count, 0)
+
+    def test_comment_and_follow_counters(self):
+        '''Счётчики комментариев и подписок'''
+        post = Post.objects.create(author=self.user, text='test')
+        comment = Comment.objects.create(
+            post=post, author=self.follower, text='comment')
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 1)
+        comment.delete()
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 0)
+        Follow.objects.create(author=self.user, user=self.follower)
+        self.assertCounters(self.user, posts=1, followers=1)
+        self.assertCounters(self.follower, following=1)
+        Follow.objects.filter(author=self.user).delete()
+        self.assertCounters(self.user, posts=1)
+        self.assertCounters(self.follower)
+
+    def test_post_delete_skips_comment_counters(self):
+        '''Удаление поста не пересчитывает его счётчик по комментарию'''
+        post = Post.objects.create(author=self.user, text='test')
+        Comment.objects.bulk_create(
+            Comment(post=post, author=self.follower, text=f'comment {n}')
+            for n in range(30)
+        )
+        with CaptureQueriesContext(connection) as queries:
+            post.delete()
+        updates = [
+            query for query in queries
+            if 'comments_count' in query['sql']
+        ]
+        self.assertEqual(updates, [])
+        self.assertFalse(Comment.objects.exists())
+        self.assertCounters(self.user)
+
+    def test_rebuild_counters(self):
+        '''Команда rebuild_counters восстанавливает счётчики'''
+        post = Post.objects.create(
+            author=self.user, group=self.group, text='test')
+        Comment.objects.create(post=post, author=self.user, text='comment')
+        Follow.objects.create(author=self.user, user=self.follower)
+        UserCounters.objects.all().delete()
+        Group.objects.update(posts_count=0)
+        Post.objects.update(comments_count=0)
+        call_command('rebuild_counters', stdout=StringIO())
+        self.assertCounters(self.user, posts=1, followers=1)
+        self.assertCounters(self.follower, following=1)
+        self.group.refresh_from_db()
+        self.assertEqual(self.group.posts_count, 1)
+        self.assertEqual(Post.objects.get(pk=post.pk).comments_count, 1)
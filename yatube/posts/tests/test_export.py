@@ -0,0 +1,78 @@
+import csv
+import io
+import json
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from ..models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class ExportTest(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.admin = User.objects.create_user(username='admin', is_staff=True)
+        cls.author = User.objects.create_user(username='leo')
+        cls.group = Group.objects.create(
+            title='группа', slug='group', description='описание')
+        cls.post = Post.objects.create(
+            author=cls.author, group=cls.group, text='пост, с "кавычками"')
+        old = Post.objects.create(author=cls.admin, text='старый пост')
+        Post.objects.filter(pk=old.pk).update(
+            pub_date=timezone.now() - timedelta(days=30))
+        Comment.objects.create(post=cls.post, author=cls.admin, text='к')
+        Follow.objects.create(user=cls.admin, author=cls.author)
+
+    def test_endpoint_streams_ndjson(self):
+        client = Client()
+        client.force_login(self.admin)
+        response = client.get(
+            reverse('posts:export', args=('posts',)), {'author': 'leo'})
+        self.assertTrue(response.streaming)
+        rows = [
+            json.loads(line)
+            for line in b''.join(response.streaming_content).splitlines()
+        ]
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]['text'], self.post.text)
+        self.assertEqual(rows[0]['group__slug'], 'group')
+
+    def test_endpoint_staff_only(self):
+        client = Client()
+        client.force_login(self.author)
+        response = client.get(reverse('posts:export', args=('posts',)))
+        self.assertEqual(response.status_code, 302)
+
+    def test_bad_filter(self):
+        client = Client()
+        client.force_login(self.admin)
+        response = client.get(
+            reverse('posts:export', args=('follows',)),
+            {'since': '2020-01-01'}
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_command_csv_date_range(self):
+        out = io.StringIO()
+        since = (timezone.now() - timedelta(days=1)).date().isoformat()
+        call_command(
+            'export_data', 'posts', '--format', 'csv', '--since', since,
+            stdout=out
+        )
+        rows = list(csv.reader(io.StringIO(out.getvalue())))
+        self.assertEqual(rows[0][0], 'id')
+        self.assertEqual([row[3] for row in rows[1:]], [self.post.text])
+
+    def test_command_other_tables(self):
+        for kind, expected in (('comments', 1), ('follows', 1), ('groups', 1)):
+            with self.subTest(kind=kind):
+                out = io.StringIO()
+                call_command('export_data', kind, stdout=out)
+                self.assertEqual(len(out.getvalue().splitlines()), expected)
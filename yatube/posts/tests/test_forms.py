@@ -1,3 +1,4 @@
+import hashlib
 import shutil
 import tempfile
 
@@ -51,6 +52,8 @@ class PostCreateFormTest(TestCase):
             b'\x02\x00\x01\x00\x00\x02\x02\x0C'
             b'\x0A\x00\x3B'
         )
+        # Файл называется по SHA-256 содержимого
+        image_name = f'posts/{hashlib.sha256(small_gif).hexdigest()}.gif'
         uploaded = SimpleUploadedFile(
             name='small.gif',
             content=small_gif,
@@ -66,7 +69,7 @@ class PostCreateFormTest(TestCase):
                 text=form_data['text'],
                 author=self.user,
                 group_id=form_data['group'],
-                image='posts/small.gif'
+                image=image_name
             ).exists()
         )
         response = self.authorized_client.post(
@@ -88,7 +91,7 @@ class PostCreateFormTest(TestCase):
                 text=form_data['text'],
                 author=self.user,
                 group_id=form_data['group'],
-                image='posts/small.gif'
+                image=image_name
             ).exists()
         )
 
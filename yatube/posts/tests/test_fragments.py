@@ -0,0 +1,67 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..caching import article_key
+from ..models import Group, Post
+
+User = get_user_model()
+
+
+class ArticleFragmentTest(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.user = User.objects.create_user(
+            username='leo', first_name='Лев', last_name='Толстой')
+        cls.group = Group.objects.create(
+            title='группа', slug='group', description='описание')
+        cls.post = Post.objects.create(
+            author=cls.user, group=cls.group, text='текст поста')
+
+    def setUp(self) -> None:
+        self.client = Client()
+        caches['default'].clear()
+
+    def test_article_shared_between_pages(self):
+        '''Блок статьи рендерится один раз для всех лент'''
+        self.client.get(reverse('posts:index'))
+        self.assertIsNotNone(caches['default'].get(article_key(self.post)))
+        with mock.patch(
+            'posts.caching.get_template'
+        ) as get_template:
+            response = self.client.get(
+                reverse('posts:group_list', args=(self.group.slug,)))
+            get_template.return_value.render.assert_not_called()
+        self.assertContains(response, 'текст поста')
+
+    def test_edit_renders_new_fragment(self):
+        '''Правка поста и смена имени автора меняют ключ блока'''
+        old_key = article_key(self.post)
+        self.post.text = 'новый текст'
+        self.post.save()
+        self.assertNotEqual(article_key(self.post), old_key)
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, 'новый текст')
+
+        self.user.first_name = 'Алексей'
+        self.user.save()
+        response = self.client.get(
+            reverse('posts:group_list', args=(self.group.slug,)))
+        self.assertContains(response, 'Алексей Толстой')
+
+    def test_author_save_without_rename_keeps_fragments(self):
+        '''Смена пароля не переписывает посты автора'''
+        user = User.objects.get(pk=self.user.pk)
+        updated_at = Post.objects.get(pk=self.post.pk).updated_at
+        user.set_password('new password')
+        user.save()
+        self.assertEqual(
+            Post.objects.get(pk=self.post.pk).updated_at, updated_at)
+        user.last_name = 'Николаев'
+        user.save()
+        self.assertGreater(
+            Post.objects.get(pk=self.post.pk).updated_at, updated_at)
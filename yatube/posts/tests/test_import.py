@@ -0,0 +1,139 @@
+import io
+import json
+import os
+import shutil
+import tarfile
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from ..importing import Importer
+from ..models import Follow, Group, Post, TimelineEntry, UserCounters
+from ..search import get_backend
+
+User = get_user_model()
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+def jpeg(color) -> bytes:
+    buffer = io.BytesIO()
+    Image.new('RGB', (8, 8), color).save(buffer, 'JPEG')
+    return buffer.getvalue()
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ImportTest(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='leo')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='группа', slug='cats', description='описание')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self) -> None:
+        self.folder = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.folder)
+        os.mkdir(os.path.join(self.folder, 'img'))
+        for name, color in (('a.jpg', 'red'), ('copy.jpg', 'red'),
+                            ('b.jpg', 'blue')):
+            with open(os.path.join(self.folder, 'img', name), 'wb') as file:
+                file.write(jpeg(color))
+        with open(os.path.join(self.folder, 'img', 'bad.jpg'), 'w') as file:
+            file.write('не картинка')
+
+    def write(self, rows, name='posts.ndjson') -> str:
+        path = os.path.join(self.folder, name)
+        with open(path, 'w', encoding='utf-8') as file:
+            for row in rows:
+                file.write(
+                    row if isinstance(row, str) else json.dumps(row))
+                file.write('\n')
+        return path
+
+    def rows(self):
+        return [
+            {'author': 'leo', 'text': 'кот', 'group': 'cats',
+             'image': 'img/a.jpg', 'pub_date': '2022-07-01T12:00:00+00:00'},
+            {'author': 'leo', 'text': 'тот же кот', 'image': 'img/copy.jpg'},
+            {'author': 'leo', 'text': 'синий', 'image': 'img/b.jpg'},
+            'не json',
+            {'author': 'nobody', 'text': 'без автора'},
+            {'author': 'leo', 'text': 'битая', 'image': 'img/bad.jpg'},
+            {'author': 'leo', 'text': 'ушла', 'group': 'dogs'},
+            {'author': 'leo', 'text': '   '},
+        ]
+
+    def test_import_dedupes_images_and_reports_errors(self):
+        result = Importer(self.write(self.rows()), batch_size=3).run()
+        self.assertEqual(result.imported, 3)
+        self.assertEqual(result.skipped, 5)
+        self.assertEqual(
+            [number for number, _ in result.errors], [4, 5, 6, 7, 8])
+        images = set(Post.objects.values_list('image', flat=True))
+        # Две одинаковые картинки — один файл
+        self.assertEqual(len(images), 2)
+        self.assertEqual(
+            len(os.listdir(os.path.join(TEMP_MEDIA_ROOT, 'posts'))), 2)
+        post = Post.objects.get(text='кот')
+        self.assertEqual(post.group, self.group)
+        self.assertEqual(post.pub_date.year, 2022)
+
+    def test_import_runs_signal_side_effects(self):
+        Importer(self.write(self.rows()[:3])).run()
+        self.assertEqual(
+            UserCounters.objects.get(user=self.author).posts_count, 3)
+        self.group.refresh_from_db()
+        self.assertEqual(self.group.posts_count, 1)
+        self.assertEqual(
+            TimelineEntry.objects.filter(user=self.reader).count(), 3)
+        found = get_backend().filter(Post.objects.all(), 'синий')
+        self.assertEqual([post.text for post in found], ['синий'])
+
+    def test_checkpoint_resumes_after_last_batch(self):
+        checkpoint = os.path.join(self.folder, 'state.json')
+        path = self.write(self.rows()[:2])
+        Importer(path, checkpoint=checkpoint).run()
+        self.write(self.rows()[:3])
+        result = Importer(path, checkpoint=checkpoint).run()
+        self.assertEqual(result.imported, 1)
+        self.assertEqual(Post.objects.count(), 3)
+        with open(checkpoint) as file:
+            self.assertEqual(json.load(file)['line'], 3)
+
+    def test_tar_archive(self):
+        archive = os.path.join(self.folder, 'posts.tar')
+        with tarfile.open(archive, 'w') as tar:
+            tar.add(self.write(self.rows()[:3]), 'dump/posts.ndjson')
+            tar.add(os.path.join(self.folder, 'img'), 'dump/img')
+        out = StringIO()
+        call_command('import_posts', archive, stdout=out, stderr=StringIO())
+        self.assertIn('Импортировано 3', out.getvalue())
+        self.assertEqual(Post.objects.exclude(image='').count(), 3)
+
+    def test_admin_import(self):
+        admin = User.objects.create_superuser('admin', 'a@a.ru', 'pass')
+        client = Client()
+        client.force_login(admin)
+        url = reverse('admin:posts_post_import')
+        self.assertEqual(client.get(url).status_code, 200)
+        rows = [{'author': 'leo', 'text': 'из админки'}, *self.rows()[3:5]]
+        with open(self.write(rows), 'rb') as file:
+            response = client.post(url, {'archive': file}, follow=True)
+        self.assertRedirects(
+            response, reverse('admin:posts_post_changelist'))
+        self.assertEqual(Post.objects.get().text, 'из админки')
+        self.assertContains(response, 'Импортировано 1, пропущено 2')
@@ -0,0 +1,68 @@
+from unittest import skipUnless
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+
+from ..models import Follow, Group, Post
+
+User = get_user_model()
+
+
+@skipUnless(connection.vendor == 'sqlite', 'EXPLAIN QUERY PLAN из SQLite')
+class ListingIndexesTest(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='leo')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.post = Post.objects.create(
+            author=cls.user, group=cls.group, text='test')
+
+    def query_plan(self, queryset) -> str:
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            return '\n'.join(row[-1] for row in cursor.fetchall())
+
+    def test_listings_use_composite_indexes(self):
+        '''Списки читаются по составному индексу без сортировки в B-tree'''
+        queries = (
+            (
+                self.user.posts.select_related('group')[:10],
+                'post_author_date_idx'
+            ),
+            (
+                self.user.posts.filter(
+                    pub_date__lte=self.post.pub_date
+                ).exclude(
+                    pub_date=self.post.pub_date, pk__gte=self.post.pk
+                ).order_by('-pub_date', '-pk')[:11],
+                'post_author_date_idx'
+            ),
+            (
+                self.group.posts.select_related('author')[:10],
+                'post_group_date_idx'
+            ),
+            (
+                self.group.posts.order_by('-pub_date', '-pk')[:11],
+                'post_group_date_idx'
+            ),
+            (
+                self.post.comments.select_related('author'),
+                'comment_post_created_idx'
+            ),
+            (
+                Follow.objects.filter(author=self.user).values('user'),
+                'follow_author_user_idx'
+            ),
+        )
+        for queryset, index in queries:
+            with self.subTest(index=index):
+                plan = self.query_plan(queryset)
+                self.assertIn(index, plan)
+                self.assertNotIn('TEMP B-TREE', plan)
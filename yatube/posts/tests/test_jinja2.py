@@ -0,0 +1,79 @@
+from importlib.util import find_spec
+from unittest import skipUnless
+
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.template.loader import get_template
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..caching import article_key
+from ..models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+def collapse(html: str) -> str:
+    return ' '.join(html.split())
+
+
+@skipUnless(find_spec('jinja2'), 'Jinja2 не установлен')
+@override_settings(POSTS_TEMPLATE_ENGINE='jinja2')
+class Jinja2TemplatesTest(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.author = User.objects.create_user(
+            username='leo', first_name='Лев', last_name='Толстой')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='описание группы')
+        cls.post = Post.objects.create(
+            author=cls.author, group=cls.group, text='текст <b>поста</b>')
+        Comment.objects.create(
+            post=cls.post, author=cls.reader, text='комментарий')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self) -> None:
+        caches['default'].clear()
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def test_pages_render(self):
+        pages = {
+            reverse('posts:index'): 'Все авторы',
+            reverse('posts:group_list', args=('group',)): 'описание группы',
+            reverse('posts:profile', args=('leo',)): 'Отписаться',
+            reverse('posts:follow_index'): 'Избранные авторы',
+            reverse('posts:post', args=(self.post.pk,)): 'комментарий',
+        }
+        for url, text in pages.items():
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertContains(response, text)
+                self.assertContains(response, 'Лев Толстой')
+                self.assertContains(response, 'Пользователь: reader')
+                # Шаблоны страницы — не Django (виджеты форм остаются ими)
+                self.assertFalse([
+                    template.name for template in response.templates
+                    if not template.name.startswith('django/forms/')
+                ])
+        self.assertIsNotNone(
+            caches['default'].get(article_key(self.post, 'jinja2')))
+
+    def test_comment_form(self):
+        response = self.client.get(reverse('posts:post', args=(self.post.pk,)))
+        self.assertContains(response, 'name="csrfmiddlewaretoken"')
+        self.assertContains(response, 'class="form-control"')
+
+    def test_article_matches_django(self):
+        self.post.image = SimpleUploadedFile('a.gif', b'GIF89a', 'image/gif')
+        self.post.image.name = 'posts/a.gif'
+        context = {'post': self.post}
+        self.assertEqual(
+            collapse(get_template(
+                'includes/article.html', using='jinja2').render(context)),
+            collapse(get_template(
+                'includes/article.html', using='django').render(context)),
+        )
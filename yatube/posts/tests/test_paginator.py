@@ -3,10 +3,14 @@ from math import ceil
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.core.cache import caches
-from django.test import Client, TestCase
+from django.db import connection
+from django.test import Client, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
+from ..caching import invalidate_feed
 from ..models import Group, Post
+from ..pagination import ListingCount, WindowedPaginator
 
 User = get_user_model()
 
@@ -65,3 +69,156 @@ class PaginatorViewTests(TestCase):
                     len(response.context['page_obj']),
                     (self.TEST_OBJECTS
                      - (settings.LIMIT * (page - 1))))
+
+    def test_cursor_pagination(self):
+        '''Курсорная пагинация проходит все посты без COUNT(*)'''
+        url_tuple = (
+            reverse('posts:index'),
+            reverse('posts:group_list', args=(self.post.group.slug,)),
+            reverse('posts:profile', args=(self.post.author.username,))
+        )
+        expected = list(Post.objects.order_by('-pub_date', '-pk'))
+        for url in url_tuple:
+            with self.subTest(url=url):
+                first_page = self.client.get(url + '?after=').context[
+                    'page_obj']
+                self.assertEqual(list(first_page), expected[:settings.LIMIT])
+                self.assertFalse(first_page.has_previous())
+                response = self.client.get(
+                    url, {'after': first_page.next_cursor})
+                last_page = response.context['page_obj']
+                self.assertEqual(list(last_page), expected[settings.LIMIT:])
+                self.assertFalse(last_page.has_next())
+                self.assertContains(response, last_page.previous_cursor)
+                response = self.client.get(
+                    url, {'before': last_page.previous_cursor})
+                self.assertEqual(
+                    list(response.context['page_obj']),
+                    expected[:settings.LIMIT])
+
+    def test_cursor_pagination_skips_count(self):
+        '''Страница по курсору не считает все посты группы'''
+        url = reverse('posts:group_list', args=(self.post.group.slug,))
+        first_page = self.client.get(url + '?after=').context['page_obj']
+        with self.assertNumQueries(2):
+            self.client.get(url, {'after': first_page.next_cursor})
+
+    def test_invalid_cursor_returns_first_page(self):
+        '''Испорченный курсор открывает первую страницу'''
+        response = self.client.get(
+            reverse('posts:index'), {'after': 'not-a-cursor'})
+        self.assertEqual(
+            list(response.context['page_obj']),
+            list(Post.objects.all()[:settings.LIMIT]))
+
+
+@override_settings(PAGINATION_WINDOW=2)
+class WindowedPaginatorTests(SimpleTestCase):
+    def test_page_window(self):
+        '''Окно из первой, последней и соседних с текущей страниц'''
+        pagin = WindowedPaginator(range(200), 10)
+        ellipsis = pagin.ELLIPSIS
+        cases = (
+            (1, [1, 2, 3, ellipsis, 20]),
+            (6, [1, ellipsis, 4, 5, 6, 7, 8, ellipsis, 20]),
+            (20, [1, ellipsis, 18, 19, 20]),
+        )
+        for number, expected in cases:
+            with self.subTest(number=number):
+                self.assertEqual(pagin.page(number).page_window, expected)
+
+    def test_short_range_is_not_elided(self):
+        '''Когда страниц мало, показываются все'''
+        pagin = WindowedPaginator(range(40), 10)
+        self.assertEqual(pagin.page(2).page_window, [1, 2, 3, 4])
+
+    def test_estimated_count_hides_last_pages(self):
+        '''При оценённом числе объектов последние номера не показываются'''
+        pagin = WindowedPaginator(range(200), 10)
+        pagin.estimated = True
+        self.assertEqual(
+            pagin.page(6).page_window,
+            [1, pagin.ELLIPSIS, 4, 5, 6, 7, 8, pagin.ELLIPSIS])
+
+
+@override_settings(LIMIT=1, PAGINATION_WINDOW=1)
+class WindowedPaginationViewTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        user = User.objects.create_user(username='leo')
+        Post.objects.bulk_create(
+            Post(author=user, text=f'test text {number}')
+            for number in range(30)
+        )
+
+    def setUp(self) -> None:
+        caches['default'].clear()
+
+    def test_index_renders_only_window(self):
+        '''Лента выводит ссылки только на страницы из окна'''
+        response = self.client.get(reverse('posts:index'), {'page': 15})
+        for number in (1, 14, 16, 30):
+            self.assertContains(response, f'page={number}"')
+        for number in (2, 13, 17, 29):
+            self.assertNotContains(response, f'page={number}"')
+        self.assertContains(response, WindowedPaginator.ELLIPSIS, count=2)
+
+
+@override_settings(PAGINATION_EXACT_COUNT_LIMIT=20)
+class ListingCountTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='leo')
+        cls.group = Group.objects.create(
+            title='test group', slug='test-slug', description='test')
+        for number in range(25):
+            Post.objects.create(
+                author=cls.user, group=cls.group, text=f'test text {number}')
+
+    def setUp(self) -> None:
+        caches['default'].clear()
+
+    def count_queries(self, url) -> int:
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return sum('COUNT(' in query['sql'] for query in queries)
+
+    def test_large_listings_use_counters(self):
+        '''Группа и профиль от порога берут число постов из счётчиков'''
+        Group.objects.filter(pk=self.group.pk).update(posts_count=40)
+        urls = (
+            reverse('posts:group_list', args=(self.group.slug,)),
+            reverse('posts:profile', args=(self.user.username,)),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertEqual(self.count_queries(url), 0)
+        response = self.client.get(urls[0])
+        self.assertEqual(response.context['page_obj'].paginator.count, 40)
+        self.assertFalse(response.context['page_obj'].paginator.estimated)
+
+    def test_small_listing_counts_exactly(self):
+        '''Ниже порога счётчик не используется: COUNT(*) точный'''
+        Group.objects.filter(pk=self.group.pk).update(posts_count=3)
+        response = self.client.get(
+            reverse('posts:group_list', args=(self.group.slug,)))
+        self.assertEqual(response.context['page_obj'].paginator.count, 25)
+
+    def test_index_count_is_cached(self):
+        '''COUNT(*) большой ленты кэшируется и дальше считается оценкой'''
+        url = reverse('posts:index')
+        self.assertEqual(self.count_queries(url), 1)
+        invalidate_feed()
+        self.assertEqual(self.count_queries(url), 0)
+        response = self.client.get(url)
+        self.assertTrue(response.context['page_obj'].paginator.estimated)
+        self.assertNotContains(response, 'Последняя')
+
+    def test_cached_count_is_keyed_by_listing(self):
+        '''Кэш числа хранится по ключу ленты'''
+        posts = Post.objects.all()
+        self.assertEqual(ListingCount('index')(posts), (25, False))
+        self.assertEqual(ListingCount('index')(posts), (25, True))
+        self.assertEqual(
+            ListingCount('other')(posts.filter(pk__lte=5)), (5, False))
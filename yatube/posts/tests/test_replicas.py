@@ -0,0 +1,57 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core.middleware import PIN_COOKIE
+
+from ..models import Post
+
+User = get_user_model()
+
+
+@override_settings(DATABASE_REPLICAS=['default'])
+class ReplicaRoutingTest(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='leo')
+        cls.post = Post.objects.create(author=cls.user, text='текст')
+
+    def setUp(self) -> None:
+        self.client = Client()
+        self.client.force_login(self.user)
+        caches['default'].clear()
+
+    def test_listing_reads_from_replica(self):
+        '''Ленты читают реплику, страница поста — основную базу'''
+        with mock.patch(
+            'core.routers.choose_replica', return_value='default'
+        ) as choose:
+            self.client.get(
+                reverse('posts:profile', args=(self.user.username,)))
+            self.assertTrue(choose.called)
+            choose.reset_mock()
+            self.client.get(reverse('posts:post', args=(self.post.pk,)))
+            choose.assert_not_called()
+
+    def test_write_pins_to_primary(self):
+        '''После записи пользователь какое-то время читает основную базу'''
+        response = self.client.post(
+            reverse('posts:add_comment', args=(self.post.pk,)),
+            {'text': 'комментарий'}
+        )
+        self.assertIn(PIN_COOKIE, response.cookies)
+        with mock.patch(
+            'core.routers.choose_replica', return_value='default'
+        ) as choose:
+            self.client.get(
+                reverse('posts:profile', args=(self.user.username,)))
+            choose.assert_not_called()
+            del self.client.cookies[PIN_COOKIE]
+            response = self.client.get(
+                reverse('posts:profile', args=(self.user.username,)))
+            self.assertTrue(choose.called)
+            self.assertNotIn(PIN_COOKIE, response.cookies)
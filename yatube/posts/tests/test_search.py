@@ -0,0 +1,83 @@
+from http import HTTPStatus
+
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Post
+from ..search import get_backend, highlight
+from ..stemmer import stem
+
+User = get_user_model()
+
+
+class StemmerTest(TestCase):
+    def test_stem(self):
+        '''Формы одного слова сводятся к общей основе'''
+        words = (
+            ('красивые', 'красив'),
+            ('книги', 'книг'),
+            ('постами', 'пост'),
+            ('читали', 'чита'),
+            ('важнейший', 'важн'),
+            ('ёлки', 'елк'),
+        )
+        for word, expected in words:
+            with self.subTest(word=word):
+                self.assertEqual(stem(word), expected)
+
+
+class PostSearchTest(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='leo', is_staff=True,
+                                            is_superuser=True)
+        cls.cat_post = Post.objects.create(
+            author=cls.user, text='Мы подобрали кошку у подъезда')
+        cls.dog_post = Post.objects.create(
+            author=cls.user, text='Собака охраняет дом')
+
+    def setUp(self) -> None:
+        self.client = Client()
+
+    def test_search_finds_word_forms(self):
+        '''Поиск находит пост по другой форме слова и выделяет её'''
+        response = self.client.get(reverse('posts:search'), {'q': 'кошки'})
+        self.assertEqual(list(response.context['page_obj']), [self.cat_post])
+        self.assertContains(response, '<mark>кошку</mark>')
+
+    def test_search_index_follows_changes(self):
+        '''Индекс обновляется при правке и удалении поста'''
+        self.dog_post.text = 'Пёс охраняет дом'
+        self.dog_post.save()
+        results = get_backend().search('дома')
+        self.assertEqual(results.count(), 1)
+        self.assertEqual(results[0:10], [self.dog_post])
+        self.dog_post.delete()
+        self.assertEqual(get_backend().search('дома').count(), 0)
+
+    def test_search_api(self):
+        '''JSON-выдача поиска'''
+        response = self.client.get(
+            reverse('posts:search_api'), {'q': 'собаки'})
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        data = response.json()
+        self.assertEqual(data['count'], 1)
+        self.assertEqual(data['results'][0]['id'], self.dog_post.pk)
+        self.assertIn('<mark>Собака</mark>', data['results'][0]['highlight'])
+
+    def test_admin_search_uses_index(self):
+        '''Поиск в админке идёт через полнотекстовый индекс'''
+        self.client.force_login(self.user)
+        response = self.client.get(
+            reverse('admin:posts_post_changelist'), {'q': 'собак'})
+        self.assertEqual(
+            list(response.context['cl'].result_list), [self.dog_post])
+
+    def test_highlight_escapes_html(self):
+        '''Подсветка экранирует текст поста'''
+        self.assertEqual(
+            highlight('<b>кот</b> спит', 'кот'),
+            '&lt;b&gt;<mark>кот</mark>&lt;/b&gt; спит'
+        )
@@ -0,0 +1,54 @@
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from ..models import Follow, Group, Post, UserCounters
+from ..seeding import seed
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class SeedCommandTest(TestCase):
+    @classmethod
+    def tearDownClass(cls) -> None:
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def test_seed_yatube(self):
+        out = StringIO()
+        call_command(
+            'seed_yatube', '--users', '50', '--groups', '3', '--posts', '200',
+            '--comments', '300', '--follows', '500', '--images', '0.5',
+            '--batch-size', '64', stdout=out
+        )
+        self.assertIn('строк/с', out.getvalue())
+        self.assertEqual(Post.objects.count(), 200)
+        self.assertEqual(Group.objects.count(), 3)
+        self.assertTrue(Post.objects.exclude(image='').exists())
+        self.assertTrue(Post.objects.filter(image='').exists())
+        # Даты постов растянуты на год, а не равны моменту вставки
+        first, last = Post.objects.order_by('pub_date').values_list(
+            'pub_date', flat=True)[::199]
+        self.assertGreater((last - first).days, 300)
+
+    def test_follow_graph_is_skewed(self):
+        '''Степенной граф: у первого автора подписчиков больше медианы'''
+        call_command(
+            'seed_yatube', '--users', '200', '--posts', '10', '--comments',
+            '0', '--follows', '2000', stdout=StringIO()
+        )
+        followers = sorted(UserCounters.objects.values_list(
+            'followers_count', flat=True), reverse=True)
+        self.assertGreater(followers[0], followers[len(followers) // 2] * 5)
+
+    def test_seed_returns_inserted_rows(self):
+        '''Отброшенные повторы подписок в итог не попадают'''
+        sizes = seed(users=5, posts=10, comments=0, follows=200)
+        self.assertLess(sizes['follows'], 200)
+        self.assertEqual(sizes['follows'], Follow.objects.count())
+        self.assertEqual(sizes['posts'], 10)
@@ -0,0 +1,106 @@
+import io
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TransactionTestCase, override_settings
+from PIL import Image
+
+from .. import thumbnails
+from ..storage import ContentAddressedStorage
+from ..models import Post, StoredImage
+
+User = get_user_model()
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+def upload(color, name='meme.jpg'):
+    buffer = io.BytesIO()
+    Image.new('RGB', (16, 16), color).save(buffer, 'JPEG')
+    return SimpleUploadedFile(name, buffer.getvalue(), 'image/jpeg')
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, THUMBNAIL_ASYNC=False)
+class ContentAddressedStorageTest(TransactionTestCase):
+    @classmethod
+    def tearDownClass(cls) -> None:
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self) -> None:
+        self.user = User.objects.create_user(username='leo')
+
+    def files(self) -> list:
+        return sorted(os.listdir(os.path.join(TEMP_MEDIA_ROOT, 'posts')))
+
+    def test_duplicates_share_one_file(self):
+        first = Post.objects.create(
+            author=self.user, text='мем', image=upload('red'))
+        second = Post.objects.create(
+            author=self.user, text='репост', image=upload('red', 'copy.jpg'))
+        self.assertEqual(first.image.name, second.image.name)
+        self.assertEqual(len(self.files()), 1)
+        self.assertEqual(
+            StoredImage.objects.get(name=first.image.name).references, 2)
+
+    def test_unreferenced_image_is_deleted(self):
+        first = Post.objects.create(
+            author=self.user, text='мем', image=upload('red'))
+        second = Post.objects.create(
+            author=self.user, text='репост', image=upload('red'))
+        name = first.image.name
+        _, geometry, options = next(thumbnails.variant_specs())
+        thumbnail = thumbnails.backend.get_cached_thumbnail(
+            name, geometry, **options)
+        self.assertTrue(first.image.storage.exists(thumbnail.name))
+        first.delete()
+        self.assertEqual(self.files(), [os.path.basename(name)])
+        # Правка: старая картинка теряет последнюю ссылку
+        post = Post.objects.get(pk=second.pk)
+        post.image = upload('blue')
+        post.save()
+        self.assertEqual(self.files(), [os.path.basename(post.image.name)])
+        self.assertFalse(StoredImage.objects.filter(name=name).exists())
+        self.assertFalse(first.image.storage.exists(thumbnail.name))
+
+    def test_upload_during_release_keeps_file(self):
+        '''Файл, удалённый release после проверки в save, пишется заново'''
+        first = Post.objects.create(
+            author=self.user, text='мем', image=upload('red'))
+        exists = ContentAddressedStorage.exists
+        checks = []
+
+        def stale_exists(storage, name):
+            # Первая проверка видит файл, который release сразу удаляет
+            if not checks:
+                checks.append(name)
+                first.delete()
+                return True
+            return exists(storage, name)
+
+        with mock.patch.object(
+                ContentAddressedStorage, 'exists', stale_exists):
+            second = Post.objects.create(
+                author=self.user, text='репост', image=upload('red'))
+        self.assertEqual(checks, [second.image.name])
+        self.assertTrue(second.image.storage.exists(second.image.name))
+        self.assertEqual(
+            StoredImage.objects.get(name=second.image.name).references, 1)
+
+    def test_collect_garbage(self):
+        post = Post.objects.create(
+            author=self.user, text='мем', image=upload('red'))
+        stray = post.image.storage.save('posts/stray.jpg', upload('green'))
+        StoredImage.objects.all().delete()
+        self.assertEqual(thumbnails.collect_garbage(), [])
+        self.assertEqual(
+            thumbnails.collect_garbage(grace=timedelta(hours=-1)), [stray])
+        self.assertEqual(self.files(), [os.path.basename(post.image.name)])
+        self.assertEqual(
+            StoredImage.objects.get(name=post.image.name).references, 1)
@@ -0,0 +1,54 @@
+import importlib
+import os
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.template import engines
+from django.test import SimpleTestCase, override_settings
+
+from core.warmup import warm_templates
+
+
+class TemplateWarmupTest(SimpleTestCase):
+    def production_settings(self):
+        with mock.patch.dict(
+                os.environ, YATUBE_SECRET_KEY='secret',
+                YATUBE_CACHE_LOCATION='127.0.0.1:11211'):
+            return importlib.import_module('yatube.settings_production')
+
+    def test_production_uses_cached_loader(self):
+        production = self.production_settings()
+        self.assertFalse(production.DEBUG)
+        self.assertTrue(production.WARM_TEMPLATES)
+        loader, _ = production.TEMPLATES[0]['OPTIONS']['loaders'][0]
+        self.assertEqual(loader, 'django.template.loaders.cached.Loader')
+
+    def test_production_cache_is_shared(self):
+        '''Версию ленты видят все процессы: кэш не в памяти процесса'''
+        cache = self.production_settings().CACHES['default']
+        self.assertEqual(
+            cache['BACKEND'], 'core.metrics.InstrumentedMemcachedCache')
+        self.assertEqual(cache['LOCATION'], ['127.0.0.1:11211'])
+
+    def test_warmup_fills_cached_loader(self):
+        with override_settings(
+                TEMPLATES=self.production_settings().TEMPLATES):
+            results = warm_templates(prefix='posts/')
+            names = {result['name'] for result in results}
+            self.assertIn('posts/index.html', names)
+            self.assertIn('posts/includes/switcher.html', names)
+            self.assertFalse([r for r in results if r['error']])
+            loader = engines['django'].engine.template_loaders[0]
+            self.assertIn('posts/index.html', loader.get_template_cache)
+
+    def test_command_reports_timings(self):
+        out = StringIO()
+        call_command(
+            'warm_templates', '--prefix', 'posts/paginator', '--render',
+            '--engine', 'django', stdout=out
+        )
+        line, total = out.getvalue().splitlines()
+        self.assertTrue(line.endswith('django:posts/paginator.html'))
+        self.assertEqual(len(line.split()), 3)
+        self.assertIn('Шаблонов: 1', total)
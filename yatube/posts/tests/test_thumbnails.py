@@ -0,0 +1,100 @@
+import shutil
+import tempfile
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from .. import thumbnails
+from ..models import Post
+
+User = get_user_model()
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, THUMBNAIL_ASYNC=True)
+class PostThumbnailTest(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        small_gif = (
+            b'\x47\x49\x46\x38\x39\x61\x02\x00'
+            b'\x01\x00\x80\x00\x00\x00\x00\x00'
+            b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+            b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+            b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+            b'\x0A\x00\x3B'
+        )
+        cls.user = User.objects.create_user(username='leo')
+        cls.post = Post.objects.create(
+            author=cls.user,
+            text='test text',
+            image=SimpleUploadedFile(
+                name='small.gif',
+                content=small_gif,
+                content_type='image/gif'
+            )
+        )
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self) -> None:
+        self.client = Client()
+        caches['default'].clear()
+
+    def test_missing_thumbnail_falls_back_to_original(self):
+        '''Без миниатюры страница отдаёт оригинал и не ждёт Pillow'''
+        with mock.patch.object(thumbnails, 'get_executor') as executor:
+            response = self.client.get(
+                reverse('posts:post', args=(self.post.pk,)))
+            self.assertContains(response, self.post.image.url)
+            executor.assert_not_called()
+
+    def test_submit_runs_in_background_once(self):
+        '''Создание миниатюры уходит в пул потоков один раз'''
+        with mock.patch.object(thumbnails, 'get_executor') as executor:
+            thumbnails.submit(self.post.image.name)
+            thumbnails.submit(self.post.image.name)
+        executor.return_value.submit.assert_called_once_with(
+            thumbnails.generate, self.post.image.name)
+
+    def test_picture_markup_for_ready_variants(self):
+        '''Готовые производные выводятся через <picture> и srcset'''
+        caches['default'].set(
+            thumbnails.variants_key(self.post.image.name),
+            {
+                'src': '/media/cache/960.jpg',
+                'sizes': thumbnails.IMAGE_SIZES,
+                'webp_srcset': '/media/cache/480.webp 480w',
+                'jpeg_srcset': '/media/cache/480.jpg 480w',
+            }
+        )
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(
+            response,
+            '<source type="image/webp" srcset="/media/cache/480.webp 480w"')
+        self.assertContains(response, 'src="/media/cache/960.jpg"')
+        self.assertNotContains(response, self.post.image.url)
+
+    def test_failed_generation_is_not_retried(self):
+        '''После неудачи миниатюры не ставятся заново до истечения срока'''
+        name = self.post.image.name
+        with mock.patch.object(
+                thumbnails.backend, 'get_thumbnail', side_effect=OSError):
+            with self.assertLogs(thumbnails.logger, 'ERROR'):
+                thumbnails.generate(name)
+        with mock.patch.object(
+                thumbnails.transaction, 'on_commit') as on_commit:
+            self.assertIsNone(thumbnails.post_variants(self.post))
+            on_commit.assert_not_called()
+            caches['default'].delete(thumbnails.failed_key(name))
+            thumbnails.post_variants(self.post)
+            on_commit.assert_called_once()
@@ -0,0 +1,87 @@
+import io
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from ..models import Post
+
+User = get_user_model()
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+ORIENTATION = 0x0112
+
+
+def jpeg(size=(40, 20), orientation=None) -> bytes:
+    image = Image.new('RGB', size, 'red')
+    exif = Image.Exif()
+    exif[0x010F] = 'Камера'
+    if orientation:
+        exif[ORIENTATION] = orientation
+    buffer = io.BytesIO()
+    image.save(buffer, 'JPEG', exif=exif.tobytes())
+    return buffer.getvalue()
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ImageUploadTest(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='leo')
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self) -> None:
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def create(self, content, client=None):
+        return (client or self.client).post(reverse('posts:post_create'), {
+            'text': 'пост с картинкой',
+            'image': SimpleUploadedFile('photo.jpg', content, 'image/jpeg'),
+        })
+
+    def test_exif_is_stripped_and_orientation_applied(self):
+        response = self.create(jpeg(orientation=6))
+        self.assertEqual(response.status_code, 302)
+        post = Post.objects.get()
+        with Image.open(post.image.path) as image:
+            self.assertNotIn(0x010F, image.getexif())
+            # Поворот из EXIF применён к пикселям
+            self.assertEqual(image.size, (20, 40))
+
+    @override_settings(POST_IMAGE_MAX_SIDE=10)
+    def test_large_image_is_downscaled(self):
+        self.create(jpeg())
+        with Image.open(Post.objects.get().image.path) as image:
+            self.assertEqual(max(image.size), 10)
+
+    @override_settings(POST_IMAGE_MAX_BYTES=100)
+    def test_oversized_file_is_rejected(self):
+        response = self.create(jpeg())
+        self.assertTrue(
+            response.context['form'].has_error('image', 'too_large'))
+        self.assertFalse(Post.objects.exists())
+
+    @override_settings(POST_IMAGE_MAX_PIXELS=100)
+    def test_pixel_bomb_is_rejected_by_header(self):
+        response = self.create(jpeg())
+        self.assertTrue(
+            response.context['form'].has_error('image', 'too_many_pixels'))
+        self.assertFalse(Post.objects.exists())
+
+    def test_csrf_is_still_checked(self):
+        client = Client(enforce_csrf_checks=True)
+        client.force_login(self.user)
+        self.assertTemplateUsed(
+            self.create(jpeg(), client), 'core/403csrf.html')
+        self.assertFalse(Post.objects.exists())
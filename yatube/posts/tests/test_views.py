@@ -1,13 +1,16 @@
 import shutil
 import tempfile
+from io import StringIO
 
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.core.cache import caches
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
 from django.test import Client, TestCase, override_settings
 from django.urls import reverse
 
+from ..caching import feed_version
 from ..forms import PostForm
 from ..models import Follow, Group, Post
 
@@ -131,22 +134,31 @@ class PostPagesTests(TestCase):
             self.post.author.posts.count())
 
     def test_zache(self):
-        """Проверка кэширования"""
+        """Проверка кэширования: повторный запрос ленты идёт из кэша"""
         response = self.guest_client.get(
             reverse('posts:index'))
-        Post.objects.create(
+        with self.assertNumQueries(0):
+            cached_response = self.guest_client.get(reverse('posts:index'))
+        self.assertEqual(response.content, cached_response.content)
+
+    def test_cache_invalidated_on_change(self):
+        """Новый пост сразу сбрасывает закэшированную ленту"""
+        response = self.guest_client.get(
+            reverse('posts:index'))
+        post = Post.objects.create(
             author=self.user,
             group=self.group,
             text='test caches')
-        self.assertEqual(
-            response.content,
-            self.guest_client.get(reverse('posts:index')).content
-        )
-        caches['default'].clear()
-        self.assertNotEqual(
-            response.content,
-            self.guest_client.get(reverse('posts:index')).content
-        )
+        response_after_create = self.guest_client.get(reverse('posts:index'))
+        self.assertNotEqual(response.content, response_after_create.content)
+        self.assertIn(post, response_after_create.context['page_obj'])
+        version = feed_version()
+        self.group.title = 'Новое название'
+        self.group.save()
+        self.assertNotEqual(version, feed_version())
+        version = feed_version()
+        self.authorized_client.force_login(self.second_user)
+        self.assertEqual(version, feed_version())
 
     def test_follow(self):
         """авторизованный пользователь может подписаваться"""
@@ -200,3 +212,56 @@ class PostPagesTests(TestCase):
             reverse('posts:follow_index')
         )
         self.assertNotIn(self.post, response.context.get('page_obj'))
+
+    def test_follow_index_reads_timeline(self):
+        """Проверка: лента подписок собирается при публикации и отписке"""
+        Follow.objects.create(author=self.user, user=self.second_user)
+        new_post = Post.objects.create(author=self.user, text='new post')
+        self.assertTrue(
+            self.second_user.timeline.filter(post=new_post).exists())
+        self.authorized_client.force_login(self.second_user)
+        response = self.authorized_client.get(reverse('posts:follow_index'))
+        self.assertEqual(
+            list(response.context['page_obj']), [new_post, self.post])
+        self.authorized_client.get(
+            reverse('posts:profile_unfollow', args=(self.user.username,)))
+        self.assertFalse(self.second_user.timeline.exists())
+
+    @override_settings(FEED_TIMELINE_SIZE=2)
+    def test_trim_timelines(self):
+        """Проверка: в ленте остаются только последние записи"""
+        Follow.objects.create(author=self.user, user=self.second_user)
+        posts = [
+            Post.objects.create(author=self.user, text=f'post {number}')
+            for number in range(3)
+        ]
+        self.assertEqual(self.second_user.timeline.count(), 4)
+        call_command('trim_timelines', stdout=StringIO())
+        self.assertEqual(
+            set(self.second_user.timeline.values_list('post', flat=True)),
+            {posts[1].pk, posts[2].pk})
+
+    @override_settings(FEED_FANOUT_LIMIT=1)
+    def test_author_no_longer_popular(self):
+        """Посты времён популярности попадают в ленту после отписок"""
+        third_user = User.objects.create_user(username='third')
+        Follow.objects.create(author=self.user, user=self.second_user)
+        Follow.objects.create(author=self.user, user=third_user)
+        new_post = Post.objects.create(author=self.user, text='new post')
+        self.assertFalse(
+            self.second_user.timeline.filter(post=new_post).exists())
+        Follow.objects.filter(author=self.user, user=third_user).delete()
+        self.assertTrue(
+            self.second_user.timeline.filter(post=new_post).exists())
+
+    @override_settings(FEED_FANOUT_LIMIT=0)
+    def test_follow_index_popular_author(self):
+        """Посты популярного автора читаются при открытии ленты"""
+        Follow.objects.create(author=self.user, user=self.second_user)
+        new_post = Post.objects.create(author=self.user, text='new post')
+        self.assertFalse(
+            self.second_user.timeline.filter(post=new_post).exists())
+        self.authorized_client.force_login(self.second_user)
+        response = self.authorized_client.get(reverse('posts:follow_index'))
+        self.assertEqual(
+            list(response.context['page_obj']), [new_post, self.post])
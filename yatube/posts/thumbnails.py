@@ -0,0 +1,245 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+from sorl.thumbnail import default, delete
+from sorl.thumbnail.base import ThumbnailBackend
+from sorl.thumbnail.conf import defaults as sorl_defaults
+from sorl.thumbnail.conf import settings as sorl_settings
+from sorl.thumbnail.images import ImageFile
+
+from .caching import invalidate_feed
+from .counters import rebuild_image_references
+from .models import Post, StoredImage
+
+logger = logging.getLogger(__name__)
+
+POST_WIDTH = 960
+POST_HEIGHT = 339
+POST_OPTIONS = {'crop': 'center'}
+# WebP для браузеров, которые его понимают, JPEG — запасной вариант
+VARIANT_FORMATS = ('WEBP', 'JPEG')
+IMAGE_SIZES = f'(max-width: {POST_WIDTH}px) 100vw, {POST_WIDTH}px'
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+class LookupBackend(ThumbnailBackend):
+    '''Бэкенд sorl, умеющий найти готовую миниатюру, не создавая её.'''
+
+    def get_options(self, source, options):
+        # Те же умолчания, что подставляет ThumbnailBackend.get_thumbnail:
+        # от них зависит имя файла миниатюры.
+        options = dict(options)
+        if sorl_settings.THUMBNAIL_PRESERVE_FORMAT:
+            options.setdefault('format', self._get_format(source))
+        for key, value in self.default_options.items():
+            options.setdefault(key, value)
+        for key, attr in self.extra_options:
+            value = getattr(sorl_settings, attr)
+            if value != getattr(sorl_defaults, attr):
+                options.setdefault(key, value)
+        return options
+
+    def get_cached_thumbnail(self, file_, geometry_string, **options):
+        source = ImageFile(file_)
+        name = self._get_thumbnail_filename(
+            source, geometry_string, self.get_options(source, options))
+        return default.kvstore.get(ImageFile(name, default.storage))
+
+
+backend = LookupBackend()
+
+
+def variant_specs():
+    '''Форматы, ширины и опции sorl для всех производных картинки.'''
+    for image_format in VARIANT_FORMATS:
+        for width in settings.POST_IMAGE_WIDTHS:
+            height = round(width * POST_HEIGHT / POST_WIDTH)
+            # Увеличиваем только до размера, в котором пост показывается.
+            options = dict(
+                POST_OPTIONS,
+                format=image_format,
+                upscale=width <= POST_WIDTH
+            )
+            yield image_format, f'{width}x{height}', options
+
+
+def variants_key(name: str) -> str:
+    return f'post-image:{name}'
+
+
+def failed_key(name: str) -> str:
+    return f'thumb-failed:{name}'
+
+
+def collect_variants(name: str, get):
+    '''
+    srcset для каждого формата и src для <img>; get — функция sorl,
+    возвращающая миниатюру или None, если её нет.
+    '''
+    srcsets = {image_format: {} for image_format in VARIANT_FORMATS}
+    src = None
+    for image_format, geometry, options in variant_specs():
+        thumbnail = get(name, geometry, **options)
+        if thumbnail is None:
+            return None
+        srcsets[image_format].setdefault(thumbnail.width, thumbnail.url)
+        if image_format == 'JPEG' and thumbnail.width <= POST_WIDTH:
+            src = thumbnail.url
+    return {
+        'src': src or thumbnail.url,
+        'sizes': IMAGE_SIZES,
+        **{
+            f'{image_format.lower()}_srcset': ', '.join(
+                f'{url} {width}w' for width, url in sorted(widths.items()))
+            for image_format, widths in srcsets.items()
+        }
+    }
+
+
+def image_variants(image):
+    '''Готовые производные картинки или None, если их ещё не создали.'''
+    if not image:
+        return None
+    cache = caches['default']
+    variants = cache.get(variants_key(image.name))
+    if variants is None:
+        variants = collect_variants(
+            image.name, backend.get_cached_thumbnail)
+        if variants is not None:
+            cache.set(variants_key(image.name), variants, None)
+    return variants
+
+
+def post_variants(post):
+    '''Производные картинки поста; если их нет, ставит их создание.'''
+    variants = image_variants(post.image)
+    if variants is None:
+        schedule(post.image)
+    return variants
+
+
+def generate(name: str) -> None:
+    close_old_connections()
+    try:
+        variants = collect_variants(name, backend.get_thumbnail)
+        caches['default'].set(variants_key(name), variants, None)
+        # Закэшированные блоки статей ещё показывают исходную картинку.
+        if Post.objects.filter(image=name).update(updated_at=timezone.now()):
+            invalidate_feed()
+    except Exception:
+        logger.exception('Не удалось создать миниатюры %s', name)
+        # До истечения срока страницы показывают оригинал и не ставят
+        # задачу заново на каждый запрос.
+        caches['default'].set(
+            failed_key(name), True, settings.THUMBNAIL_RETRY_AFTER)
+    finally:
+        caches['default'].delete(f'thumbnail:pending:{name}')
+        close_old_connections()
+
+
+def image_storage():
+    return Post._meta.get_field('image').storage
+
+
+def release(names) -> None:
+    '''
+    Удаляет файлы, на которые больше не ссылается ни один пост, вместе
+    с миниатюрами sorl. Вызывается после коммита.
+    '''
+    for name in names:
+        # Файл удаляется до коммита удаления строки: параллельная
+        # загрузка того же файла ждёт на счётчике ссылок, затем создаёт
+        # строку заново и дописывает файл в ensure_stored.
+        with transaction.atomic():
+            deleted, _ = StoredImage.objects.filter(
+                name=name, references__lte=0).delete()
+            if not deleted:
+                continue
+            caches['default'].delete_many(
+                [variants_key(name), failed_key(name)])
+            try:
+                # Миниатюры sorl учтены по имени в хранилище по умолчанию,
+                # как их создавал generate.
+                delete(name)
+            except Exception:
+                logger.exception('Не удалось удалить картинку %s', name)
+
+
+def ensure_stored(name: str, read) -> None:
+    '''
+    Строка StoredImage для name только что создана заново. Хранилище
+    могло не записать файл, потому что он ещё был, а release успел его
+    удалить: тогда пишем содержимое из read() ещё раз.
+    '''
+    storage = image_storage()
+    try:
+        if storage.exists(name):
+            return
+        content = read()
+        if content is None:
+            logger.error('Картинка %s удалена, содержимого нет', name)
+            return
+        content.seek(0)
+        storage.save(name, content)
+    except Exception:
+        logger.exception('Не удалось проверить картинку %s', name)
+
+
+def collect_garbage(grace=timedelta(hours=1)) -> list:
+    '''
+    Сверяет ссылки с постами и удаляет осиротевшие картинки, в том числе
+    файлы в каталоге постов, о которых база не знает. Файлы моложе grace
+    не трогаем: их пост может быть ещё не закоммичен.
+    '''
+    rebuild_image_references()
+    orphans = list(StoredImage.objects.filter(
+        references__lte=0).values_list('name', flat=True))
+    release(orphans)
+    storage = image_storage()
+    directory = Post._meta.get_field('image').upload_to
+    if storage.exists(directory):
+        known = set(StoredImage.objects.values_list('name', flat=True))
+        cutoff = timezone.now() - grace
+        for filename in storage.listdir(directory)[1]:
+            name = f'{directory}{filename}'
+            if (name not in known
+                    and storage.get_modified_time(name) < cutoff):
+                delete(name)
+                orphans.append(name)
+    return orphans
+
+
+def get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.THUMBNAIL_WORKERS,
+                thread_name_prefix='thumbnails'
+            )
+    return _executor
+
+
+def submit(name: str) -> None:
+    '''Ставит создание миниатюры в фоновый пул, не дублируя задачи.'''
+    if not caches['default'].add(f'thumbnail:pending:{name}', True, 300):
+        return
+    if settings.THUMBNAIL_ASYNC:
+        get_executor().submit(generate, name)
+    else:
+        generate(name)
+
+
+def schedule(image) -> None:
+    '''Запускает создание миниатюры после коммита текущей транзакции.'''
+    if image and not caches['default'].get(failed_key(image.name)):
+        name = image.name
+        transaction.on_commit(lambda: submit(name))
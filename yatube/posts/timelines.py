@@ -0,0 +1,247 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection, transaction
+
+from .models import Follow, Post, TimelineEntry, UserCounters
+
+POPULAR_AUTHORS_KEY = 'timeline:popular_authors'
+
+
+def popular_author_ids() -> set:
+    '''
+    Авторы, чьи посты не раскладываются по лентам подписчиков
+    при публикации, а дочитываются при открытии ленты.
+    '''
+    cache = caches['default']
+    author_ids = cache.get(POPULAR_AUTHORS_KEY)
+    if author_ids is None:
+        author_ids = set(
+            UserCounters.objects.filter(
+                followers_count__gt=settings.FEED_FANOUT_LIMIT
+            ).values_list('user_id', flat=True)
+        )
+        cache.set(
+            POPULAR_AUTHORS_KEY,
+            author_ids,
+            settings.FEED_POPULAR_AUTHORS_TIMEOUT
+        )
+    return author_ids
+
+
+def mark_popular(author_id: int) -> None:
+    cache = caches['default']
+    author_ids = cache.get(POPULAR_AUTHORS_KEY)
+    if author_ids is not None and author_id not in author_ids:
+        author_ids.add(author_id)
+        cache.set(
+            POPULAR_AUTHORS_KEY,
+            author_ids,
+            settings.FEED_POPULAR_AUTHORS_TIMEOUT
+        )
+
+
+def fan_out(post: Post) -> None:
+    '''Раскладывает новый пост по лентам подписчиков автора.'''
+    limit = settings.FEED_FANOUT_LIMIT
+    follower_ids = list(
+        Follow.objects.filter(author_id=post.author_id).values_list(
+            'user_id', flat=True)[:limit + 1]
+    )
+    if len(follower_ids) > limit:
+        mark_popular(post.author_id)
+        return
+    TimelineEntry.objects.bulk_create(
+        (
+            TimelineEntry(
+                user_id=user_id,
+                post=post,
+                author_id=post.author_id,
+                pub_date=post.pub_date
+            )
+            for user_id in follower_ids
+        ),
+        ignore_conflicts=True
+    )
+
+
+def fan_out_many(posts) -> None:
+    '''fan_out для пачки постов: подписчики читаются раз на автора.'''
+    limit = settings.FEED_FANOUT_LIMIT
+    by_author = {}
+    for post in posts:
+        by_author.setdefault(post.author_id, []).append(post)
+    entries = []
+    for author_id, author_posts in by_author.items():
+        follower_ids = list(
+            Follow.objects.filter(author_id=author_id).values_list(
+                'user_id', flat=True)[:limit + 1]
+        )
+        if len(follower_ids) > limit:
+            mark_popular(author_id)
+            continue
+        entries.extend(
+            TimelineEntry(
+                user_id=user_id,
+                post_id=post.pk,
+                author_id=author_id,
+                pub_date=post.pub_date
+            )
+            for post in author_posts
+            for user_id in follower_ids
+        )
+    TimelineEntry.objects.bulk_create(entries, ignore_conflicts=True)
+
+
+def backfill(user_id: int, author_id: int) -> None:
+    '''Добавляет в ленту подписчика последние посты нового автора.'''
+    posts = Post.objects.filter(author_id=author_id).values_list(
+        'pk', 'pub_date')[:settings.FEED_TIMELINE_SIZE]
+    TimelineEntry.objects.bulk_create(
+        (
+            TimelineEntry(
+                user_id=user_id,
+                post_id=pk,
+                author_id=author_id,
+                pub_date=pub_date
+            )
+            for pk, pub_date in posts
+        ),
+        ignore_conflicts=True
+    )
+    trim_timelines(user_id=user_id)
+
+
+def prune(user_id: int, author_id: int) -> None:
+    TimelineEntry.objects.filter(user_id=user_id, author_id=author_id).delete()
+
+
+def trim_timelines(user_id: int = None, followers_of: int = None) -> int:
+    '''
+    Удаляет записи лент старше последних FEED_TIMELINE_SIZE: читаются
+    только они, а fan_out лишь добавляет. Без аргументов обрезает все
+    ленты, с user_id — одну, с followers_of — ленты подписчиков автора.
+    Возвращает число удалённых записей.
+    '''
+    entry, follow = TimelineEntry._meta.db_table, Follow._meta.db_table
+    where, params = '', []
+    if user_id is not None:
+        where, params = 'WHERE user_id = %s', [user_id]
+    elif followers_of is not None:
+        where = (
+            f'WHERE user_id IN '
+            f'(SELECT user_id FROM {follow} WHERE author_id = %s)'
+        )
+        params = [followers_of]
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'''
+            DELETE FROM {entry} WHERE id IN (
+                SELECT id FROM (
+                    SELECT id, ROW_NUMBER() OVER (
+                        PARTITION BY user_id
+                        ORDER BY pub_date DESC, post_id DESC
+                    ) AS position
+                    FROM {entry} {where}
+                ) ranked
+                WHERE position > %s
+            )
+            ''',
+            [*params, settings.FEED_TIMELINE_SIZE]
+        )
+        return cursor.rowcount
+
+
+def follower_removed(author_id: int) -> None:
+    '''
+    Автор опустился до FEED_FANOUT_LIMIT подписчиков и снова
+    раскладывается при публикации. Его посты времён популярности
+    в ленты не попадали, а дочитываться перестанут: добавляем
+    последние FEED_TIMELINE_SIZE из них в ленты подписчиков.
+    '''
+    if not UserCounters.objects.filter(
+            user_id=author_id,
+            followers_count=settings.FEED_FANOUT_LIMIT).exists():
+        return
+    entry, follow, post = (
+        model._meta.db_table for model in (TimelineEntry, Follow, Post))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'''
+            INSERT INTO {entry} (user_id, post_id, author_id, pub_date)
+            SELECT f.user_id, p.id, p.author_id, p.pub_date
+            FROM {follow} f
+            JOIN (
+                SELECT id, author_id, pub_date FROM {post}
+                WHERE author_id = %s
+                ORDER BY pub_date DESC, id DESC
+                LIMIT %s
+            ) p ON p.author_id = f.author_id
+            WHERE f.author_id = %s AND NOT EXISTS (
+                SELECT 1 FROM {entry} e
+                WHERE e.user_id = f.user_id AND e.post_id = p.id
+            )
+            ''',
+            [author_id, settings.FEED_TIMELINE_SIZE, author_id]
+        )
+    trim_timelines(followers_of=author_id)
+    caches['default'].delete(POPULAR_AUTHORS_KEY)
+
+
+@transaction.atomic
+def rebuild_timelines() -> None:
+    '''
+    Собирает ленты всех пользователей заново одним INSERT ... SELECT:
+    последние FEED_TIMELINE_SIZE постов непопулярных авторов.
+    '''
+    entry, follow, post, counters = (
+        model._meta.db_table
+        for model in (TimelineEntry, Follow, Post, UserCounters)
+    )
+    TimelineEntry.objects.all().delete()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'''
+            INSERT INTO {entry} (user_id, post_id, author_id, pub_date)
+            SELECT user_id, post_id, author_id, pub_date FROM (
+                SELECT f.user_id, p.id AS post_id, p.author_id, p.pub_date,
+                       ROW_NUMBER() OVER (
+                           PARTITION BY f.user_id
+                           ORDER BY p.pub_date DESC, p.id DESC
+                       ) AS position
+                FROM {follow} f
+                JOIN {post} p ON p.author_id = f.author_id
+                WHERE f.author_id NOT IN (
+                    SELECT user_id FROM {counters}
+                    WHERE followers_count > %s
+                )
+            ) ranked
+            WHERE position <= %s
+            ''',
+            [settings.FEED_FANOUT_LIMIT, settings.FEED_TIMELINE_SIZE]
+        )
+    caches['default'].delete(POPULAR_AUTHORS_KEY)
+
+
+def timeline_post_ids(user) -> list:
+    '''
+    Последние FEED_TIMELINE_SIZE постов ленты: готовые записи
+    плюс свежие посты популярных авторов, на которых подписан user.
+    '''
+    size = settings.FEED_TIMELINE_SIZE
+    posts = list(
+        TimelineEntry.objects.filter(user=user).values_list(
+            'pub_date', 'post_id')[:size]
+    )
+    popular = popular_author_ids()
+    if popular:
+        authors = Follow.objects.filter(
+            user=user, author__in=popular).values_list('author', flat=True)
+        posts += Post.objects.filter(author__in=list(authors)).values_list(
+            'pub_date', 'pk')[:size]
+        posts.sort(reverse=True)
+    post_ids, seen = [], set()
+    for _, pk in posts:
+        if pk not in seen:
+            seen.add(pk)
+            post_ids.append(pk)
+    return post_ids[:size]
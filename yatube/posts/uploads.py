@@ -0,0 +1,139 @@
+'''
+Загрузка картинок постов без лишней памяти. CappedUploadHandler пишет
+файл сразу на диск и перестаёт писать после POST_IMAGE_MAX_BYTES.
+check_upload отсекает такие файлы и картинки с огромным числом
+пикселей по заголовку, до декодирования. reencode пересохраняет
+картинку без EXIF и других метаданных, уменьшая её до
+POST_IMAGE_MAX_SIDE ещё при декодировании.
+'''
+import tempfile
+import threading
+import warnings
+from functools import wraps
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.base import File
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+from django.views.decorators.csrf import csrf_exempt, csrf_protect
+from PIL import Image, ImageOps
+
+# Анимацию пересохранение потеряет, а метаданных в GIF нет
+PASSTHROUGH_FORMATS = ('GIF',)
+SAVE_OPTIONS = {
+    'JPEG': {'quality': 90, 'optimize': True},
+    'WEBP': {'quality': 90},
+}
+
+_slots = None
+_slots_lock = threading.Lock()
+
+
+class CappedUploadHandler(TemporaryFileUploadHandler):
+    '''
+    Пишет файл во временный файл без буфера в памяти. После max_bytes
+    данные больше не пишутся, а файл помечается too_large.
+    '''
+
+    def __init__(self, request=None, max_bytes=None):
+        super().__init__(request)
+        self.max_bytes = max_bytes or settings.POST_IMAGE_MAX_BYTES
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.received = 0
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+        if self.received <= self.max_bytes:
+            self.file.write(raw_data)
+
+    def file_complete(self, file_size):
+        file = super().file_complete(min(file_size, self.max_bytes))
+        file.too_large = self.received > self.max_bytes
+        return file
+
+
+def capped_uploads(view):
+    '''
+    Принимает файлы вида через CappedUploadHandler. Обработчики нужно
+    поставить до разбора тела, а CsrfViewMiddleware читает request.POST
+    раньше вида, поэтому проверка CSRF переносится внутрь.
+    '''
+    protected = csrf_protect(view)
+
+    @wraps(view)
+    def wrapped(request, *args, **kwargs):
+        request.upload_handlers = [CappedUploadHandler(request)]
+        return protected(request, *args, **kwargs)
+    return csrf_exempt(wrapped)
+
+
+def check_upload(file) -> None:
+    '''
+    Отклоняет файл больше лимита и картинку, у которой по заголовку
+    слишком много пикселей. Сами пиксели не декодируются.
+    '''
+    if getattr(file, 'too_large', False):
+        raise ValidationError(
+            'Файл больше %(limit)d МБ',
+            code='too_large',
+            params={'limit': settings.POST_IMAGE_MAX_BYTES // 2 ** 20}
+        )
+    file.seek(0)
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', Image.DecompressionBombWarning)
+            with Image.open(file) as image:
+                width, height = image.size
+    except Image.DecompressionBombError:
+        width = height = settings.POST_IMAGE_MAX_PIXELS
+    except Exception:
+        # Не картинка: сообщение об ошибке даст forms.ImageField
+        return
+    finally:
+        file.seek(0)
+    if width * height > settings.POST_IMAGE_MAX_PIXELS:
+        raise ValidationError(
+            'Картинка больше %(limit)d мегапикселей',
+            code='too_many_pixels',
+            params={'limit': settings.POST_IMAGE_MAX_PIXELS // 10 ** 6}
+        )
+
+
+def processing_slots() -> threading.BoundedSemaphore:
+    '''Сколько картинок декодируется одновременно во всём процессе.'''
+    global _slots
+    with _slots_lock:
+        if _slots is None:
+            _slots = threading.BoundedSemaphore(
+                settings.POST_IMAGE_PROCESSING_SLOTS)
+    return _slots
+
+
+def reencode(file):
+    '''
+    Пересохраняет картинку без метаданных, с учётом поворота из EXIF.
+    JPEG декодируется сразу в уменьшенном масштабе (draft), так что
+    память ограничена POST_IMAGE_MAX_SIDE, а не размером снимка.
+    '''
+    max_side = settings.POST_IMAGE_MAX_SIDE
+    file.seek(0)
+    with processing_slots(), Image.open(file) as source:
+        image_format = source.format
+        if image_format in PASSTHROUGH_FORMATS:
+            file.seek(0)
+            return file
+        source.draft(source.mode, (max_side, max_side))
+        image = ImageOps.exif_transpose(source)
+        image.thumbnail((max_side, max_side))
+        if image_format == 'JPEG' and image.mode not in ('RGB', 'L'):
+            image = image.convert('RGB')
+        # Безымянный временный файл удалится сам, когда его закроют
+        result = File(tempfile.TemporaryFile(), name=file.name)
+        options = dict(SAVE_OPTIONS.get(image_format, {}))
+        if source.info.get('icc_profile'):
+            options['icc_profile'] = source.info['icc_profile']
+        image.save(result, image_format, **options)
+    result.seek(0)
+    return result
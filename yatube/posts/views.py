@@ -1,69 +1,144 @@
 from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth.decorators import login_required
-from django.core.cache import caches
-from django.core.paginator import Paginator
+from django.http import (
+    HttpResponseBadRequest, JsonResponse, StreamingHttpResponse
+)
 from django.shortcuts import get_object_or_404, redirect, render
+from django.utils.http import urlencode
 
+from core.routers import use_replica
+
+from .caching import get_comments_page, get_feed_page
+from .conditional import (
+    conditional, follow_state, group_state, index_state, post_state,
+    profile_state
+)
+from .counters import user_counters
+from .export import ExportError, export_lines, export_rows
 from .forms import CommentForm, PostForm
 from .models import Follow, Group, Post, User
+from .pagination import CursorPaginator, ListingCount, WindowedPaginator
+from .search import get_backend, highlight
+from .uploads import capped_uploads
+
+
+def render_posts(request, template_name: str, context: dict):
+    '''Ленты и страница поста рендерятся движком POSTS_TEMPLATE_ENGINE.'''
+    return render(
+        request, template_name, context,
+        using=settings.POSTS_TEMPLATE_ENGINE
+    )
+
+
+def use_cursor(request) -> bool:
+    return (
+        settings.POSTS_PAGINATION == 'cursor'
+        or 'after' in request.GET
+        or 'before' in request.GET
+    )
 
 
-def paginator(posts, page_numb):
-    pagin = Paginator(posts, settings.LIMIT)
-    return pagin.get_page(page_numb)
+def paginator(posts, request, counter=None):
+    if use_cursor(request):
+        return CursorPaginator(posts, settings.LIMIT).get_page(
+            after=request.GET.get('after'),
+            before=request.GET.get('before'))
+    pagin = WindowedPaginator(posts, settings.LIMIT, counter=counter)
+    return pagin.get_page(request.GET.get('page'))
 
 
-def index(request):
-    posts = caches['default'].get('posts')
-    if posts is None:
-        posts = Post.objects.select_related('author', 'group')
-        caches['default'].set('posts', posts, 20)
-    page_obj = paginator(posts, request.GET.get('page'))
-    return render(request, "posts/index.html",
-                  {"page_obj": page_obj})
+@use_replica
+@conditional(index_state)
+def index(request, state):
+    posts = Post.objects.select_related('author', 'group')
+    if use_cursor(request):
+        page_obj = paginator(posts, request)
+    else:
+        page_obj = get_feed_page(posts, request.GET.get('page'))
+    return render_posts(request, "posts/index.html",
+                        {"page_obj": page_obj})
 
 
-def group_posts(request, slug):
+@use_replica
+@conditional(group_state)
+def group_posts(request, slug, state):
     group = get_object_or_404(Group, slug=slug)
     posts = group.posts.select_related('author')
-    page_obj = paginator(posts, request.GET.get('page'))
+    page_obj = paginator(posts, request, ListingCount(
+        f'group:{group.pk}', known=group.posts_count))
     context = {'group': group,
                'page_obj': page_obj, }
-    return render(request, 'posts/group_list.html', context)
+    return render_posts(request, 'posts/group_list.html', context)
 
 
-def profile(request, username):
-    author = get_object_or_404(User, username=username)
+@use_replica
+@conditional(profile_state)
+def profile(request, username, state):
+    author = get_object_or_404(
+        User.objects.select_related('counters'), username=username)
     posts = author.posts.select_related('group')
-    page_obj = paginator(posts, request.GET.get('page'))
-    count = page_obj.paginator.count
-    following = (
-        request.user.is_authenticated
-        and request.user.follower.filter(author=author).exists())
+    counters = user_counters(author)
+    page_obj = paginator(posts, request, ListingCount(
+        f'author:{author.pk}', known=counters.posts_count))
     context = {
-        'following': following,
+        'following': state.data['following'],
         'author': author,
         'page_obj': page_obj,
-        'count': count
+        'count': counters.posts_count,
+        'counters': counters,
     }
-    return render(request, 'posts/profile.html', context)
+    return render_posts(request, 'posts/profile.html', context)
 
 
-def post_detail(request, post_id):
+@conditional(post_state)
+def post_detail(request, post_id, state):
     post = get_object_or_404(Post.objects.select_related(
-        'author'), pk=post_id)
-    count = post.author.posts.count
-    comments = post.comments.select_related('author')
+        'author__counters', 'group'), pk=post_id)
+    count = user_counters(post.author).posts_count
+    comments = get_comments_page(
+        post.comments.select_related('author'),
+        post.pk,
+        after=request.GET.get('after')
+    )
     context = {
         'post': post,
         'count': count,
         'comments': comments,
         'form': CommentForm()
     }
-    return render(request, 'posts/post_detail.html', context)
+    return render_posts(request, 'posts/post_detail.html', context)
+
+
+def post_comments(request, post_id):
+    '''Подгрузка следующих комментариев: HTML-фрагмент или JSON.'''
+    post = get_object_or_404(Post.objects.only('pk'), pk=post_id)
+    comments = get_comments_page(
+        post.comments.select_related('author'),
+        post.pk,
+        after=request.GET.get('after')
+    )
+    if request.GET.get('format') == 'json':
+        return JsonResponse({
+            'next': comments.next_cursor,
+            'comments': [
+                {
+                    'id': comment.pk,
+                    'author': comment.author.username,
+                    'text': comment.text,
+                    'created': comment.created.isoformat(),
+                }
+                for comment in comments
+            ],
+        })
+    return render_posts(request, 'includes/comment_list.html', {
+        'post': post,
+        'comments': comments,
+    })
 
 
 @login_required
+@capped_uploads
 def post_create(request):
     form = PostForm(
         request.POST or None,
@@ -81,6 +156,7 @@ def post_create(request):
     return render(request, "posts/create_post.html", context)
 
 
+@capped_uploads
 def post_edit(request, post_id):
     post = get_object_or_404(Post, pk=post_id)
 
@@ -133,13 +209,85 @@ def profile_unfollow(request, username):
     return redirect('posts:profile', username)
 
 
+@use_replica
 @login_required
-def follow_index(request):
-    posts = Post.objects.select_related('group').filter(
-        author__following__user=request.user
+@conditional(follow_state)
+def follow_index(request, state):
+    post_ids = state.data['post_ids']
+    posts = Post.objects.select_related('author', 'group').filter(
+        pk__in=post_ids
     )
-    page_obj = paginator(posts, request.GET.get('page'))
+    page_obj = paginator(posts, request, ListingCount(
+        f'follow:{request.user.pk}', known=len(post_ids)))
     context = {
         'page_obj': page_obj,
     }
-    return render(request, 'posts/follow.html', context)
+    return render_posts(request, 'posts/follow.html', context)
+
+
+def search_page(request):
+    query = request.GET.get('q', '').strip()
+    pagin = WindowedPaginator(get_backend().search(query), settings.LIMIT)
+    page_obj = pagin.get_page(request.GET.get('page'))
+    for post in page_obj:
+        post.highlight = highlight(post.text, query)
+    return query, page_obj
+
+
+@use_replica
+def search(request):
+    query, page_obj = search_page(request)
+    context = {
+        'query': query,
+        'page_obj': page_obj,
+        'page_query': urlencode({'q': query}) + '&',
+    }
+    return render(request, 'posts/search.html', context)
+
+
+def search_api(request):
+    query, page_obj = search_page(request)
+    return JsonResponse({
+        'query': query,
+        'count': page_obj.paginator.count,
+        'num_pages': page_obj.paginator.num_pages,
+        'page': page_obj.number,
+        'results': [
+            {
+                'id': post.pk,
+                'text': post.text,
+                'highlight': post.highlight,
+                'author': post.author.username,
+                'group': post.group.slug if post.group else None,
+                'pub_date': post.pub_date.isoformat(),
+            }
+            for post in page_obj
+        ],
+    })
+
+
+@use_replica
+@staff_member_required
+def export(request, kind):
+    '''Потоковая выгрузка таблицы: ?format=ndjson|csv и фильтры.'''
+    fmt = request.GET.get('format', 'ndjson')
+    try:
+        columns, rows = export_rows(
+            kind,
+            author=request.GET.get('author'),
+            group=request.GET.get('group'),
+            since=request.GET.get('since'),
+            until=request.GET.get('until'),
+        )
+        lines = export_lines(fmt, columns, rows)
+    except ExportError as error:
+        return HttpResponseBadRequest(str(error))
+    response = StreamingHttpResponse(
+        lines,
+        content_type=(
+            'text/csv' if fmt == 'csv' else 'application/x-ndjson'
+        ) + '; charset=utf-8'
+    )
+    response['Content-Disposition'] = (
+        f'attachment; filename="{kind}.{fmt}"')
+    return response
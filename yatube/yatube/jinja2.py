@@ -0,0 +1,39 @@
+"""
+Окружение Jinja2 для шаблонов из каталога jinja2/. Повторяет теги
+и фильтры, которыми пользуются шаблоны Django тех же страниц.
+"""
+
+from django.template import defaultfilters
+from django.templatetags.static import static
+from django.urls import reverse
+from django.utils.timezone import template_localtime
+from jinja2 import Environment
+
+from core.templatetags.user_filters import addclass
+from posts.caching import cached_articles
+from posts.thumbnails import post_variants
+
+
+def url(name, *args, **kwargs):
+    return reverse(name, args=args, kwargs=kwargs)
+
+
+def date(value, arg=None):
+    # Шаблоны Django переводят время в текущий часовой пояс сами
+    return defaultfilters.date(template_localtime(value), arg)
+
+
+def environment(**options):
+    env = Environment(**options)
+    env.globals.update({
+        'static': static,
+        'url': url,
+        'post_variants': post_variants,
+        'cached_articles': lambda posts: cached_articles(posts, 'jinja2'),
+    })
+    env.filters.update({
+        'addclass': addclass,
+        'date': date,
+        'truncatechars': defaultfilters.truncatechars,
+    })
+    return env
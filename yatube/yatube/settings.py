@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/2.2/ref/settings/
 """
 
 import os
+from importlib.util import find_spec
 
 # Build paths inside the project like this: os.path.join(BASE_DIR, ...)
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -31,7 +32,7 @@ EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'BACKEND': 'core.metrics.InstrumentedLocMemCache',
     }
 }
 
@@ -62,10 +63,12 @@ INSTALLED_APPS = [
     'users.apps.UsersConfig',
     'core.apps.CoreConfig',
     'about.apps.AboutConfig',
+    'api.apps.ApiConfig',
     'sorl.thumbnail'
 ]
 
 MIDDLEWARE = [
+    'core.middleware.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -73,9 +76,81 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'core.middleware.ReplicaMiddleware',
 ]
 
 LIMIT: int = 10
+# Сколько номеров страниц показывать по обе стороны от текущей
+PAGINATION_WINDOW: int = 2
+# С какого размера ленты не считать COUNT(*) на каждый запрос:
+# брать счётчик или закэшированное на PAGINATION_COUNT_TIMEOUT число
+PAGINATION_EXACT_COUNT_LIMIT: int = 10_000
+PAGINATION_COUNT_TIMEOUT: int = 60
+# Наибольший размер страницы API (?limit=)
+API_MAX_LIMIT: int = 100
+# Сколько строк выгрузка читает из базы за раз
+EXPORT_CHUNK_SIZE: int = 2000
+# 'pages' — нумерованные страницы, 'cursor' — переход по ?after=/?before=
+POSTS_PAGINATION = 'pages'
+# Длина заранее собранной ленты подписок
+FEED_TIMELINE_SIZE: int = 500
+# Посты авторов с большим числом подписчиков читаются при открытии ленты
+FEED_FANOUT_LIMIT: int = 1000
+FEED_POPULAR_AUTHORS_TIMEOUT: int = 300
+# Миниатюры постов создаются в фоновом пуле потоков, а не в запросе
+THUMBNAIL_ASYNC = True
+THUMBNAIL_WORKERS: int = 2
+# После неудачи миниатюры не создаются заново столько секунд
+THUMBNAIL_RETRY_AFTER: int = 60 * 30
+# Полнотекстовый поиск: SQLiteFTSBackend или PostgresSearchBackend
+POSTS_SEARCH_BACKEND = 'posts.search.SQLiteFTSBackend'
+# Ширины производных картинок поста для srcset
+POST_IMAGE_WIDTHS = (480, 960, 1440)
+# Загрузка картинки поста: размер файла, пиксели по заголовку,
+# наибольшая сторона после пересохранения и число одновременных
+# пересохранений в процессе
+POST_IMAGE_MAX_BYTES: int = 10 * 1024 * 1024
+POST_IMAGE_MAX_PIXELS: int = 25_000_000
+POST_IMAGE_MAX_SIDE: int = 2560
+POST_IMAGE_PROCESSING_SLOTS: int = 2
+# Страницы ленты сбрасываются сигналами; таймаут — страховка на случай,
+# если сброс в общий кэш не дошёл
+FEED_CACHE_TIMEOUT: int = 60 * 10
+# Блоки статей кэшируются по id и updated_at поста
+ARTICLE_CACHE_TIMEOUT: int = 60 * 60 * 24
+# Комментариев на странице поста и в одной подгрузке
+COMMENTS_LIMIT: int = 20
+# Первая страница комментариев сбрасывается при изменении комментариев,
+# таймаут ограничивает устаревание имён авторов
+COMMENTS_CACHE_TIMEOUT: int = 60 * 10
+
+# Метрики запроса в заголовке Server-Timing и в логе yatube.metrics
+SERVER_TIMING = DEBUG
+# Компилировать все шаблоны при старте WSGI-процесса (см. settings_production)
+WARM_TEMPLATES = False
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'filters': {
+        'require_debug_true': {
+            '()': 'django.utils.log.RequireDebugTrue',
+        },
+    },
+    'handlers': {
+        'metrics': {
+            'class': 'logging.StreamHandler',
+            'filters': ['require_debug_true'],
+        },
+    },
+    'loggers': {
+        'yatube.metrics': {
+            'handlers': ['metrics'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
+}
 
 ROOT_URLCONF = 'yatube.urls'
 
@@ -98,6 +173,21 @@ TEMPLATES = [
         },
     },
 ]
+# Jinja2 — необязательная зависимость: движок есть, только если пакет
+# установлен. Шаблоны лежат в jinja2/ под теми же именами.
+if find_spec('jinja2'):
+    TEMPLATES.append({
+        'NAME': 'jinja2',
+        'BACKEND': 'django.template.backends.jinja2.Jinja2',
+        'DIRS': [os.path.join(BASE_DIR, 'jinja2')],
+        'OPTIONS': {
+            'environment': 'yatube.jinja2.environment',
+            'context_processors': (
+                TEMPLATES[0]['OPTIONS']['context_processors']),
+        },
+    })
+# Движок лент и страницы поста: 'django' или 'jinja2'
+POSTS_TEMPLATE_ENGINE = 'django'
 
 WSGI_APPLICATION = 'yatube.wsgi.application'
 
@@ -111,6 +201,19 @@ DATABASES = {
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
     }
 }
+# Реплика только для чтения. Локально это копия db.sqlite3:
+# YATUBE_REPLICA_DB=replica.sqlite3 python manage.py sync_replica
+REPLICA_DB = os.getenv('YATUBE_REPLICA_DB')
+if REPLICA_DB:
+    DATABASES['replica'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.path.join(BASE_DIR, REPLICA_DB),
+        'TEST': {'MIRROR': 'default'},
+    }
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+DATABASE_ROUTERS = ['core.routers.PrimaryReplicaRouter']
+# Сколько секунд после записи пользователь читает основную базу
+REPLICA_PIN_SECONDS: int = 10
 
 
 # Password validation
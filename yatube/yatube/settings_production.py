@@ -0,0 +1,45 @@
+"""
+Настройки для продакшена: DJANGO_SETTINGS_MODULE=yatube.settings_production.
+Отличаются от settings.py отключённой отладкой, общим для процессов
+кэшем и кэшированием шаблонов, которые компилируются один раз при
+старте процесса.
+"""
+
+import os
+
+from .settings import *  # noqa: F401,F403
+from .settings import TEMPLATES
+
+DEBUG = False
+SECRET_KEY = os.environ['YATUBE_SECRET_KEY']
+ALLOWED_HOSTS = os.getenv('YATUBE_ALLOWED_HOSTS', 'localhost').split(',')
+SERVER_TIMING = False
+
+# Версия ленты и закэшированные страницы должны быть общими для всех
+# процессов: в LocMem сброс видит только процесс, принявший запись.
+# Адреса memcached через запятую.
+CACHES = {
+    'default': {
+        'BACKEND': 'core.metrics.InstrumentedMemcachedCache',
+        'LOCATION': os.environ['YATUBE_CACHE_LOCATION'].split(','),
+    }
+}
+
+# Шаблоны разбираются один раз на процесс; APP_DIRS вместе с явными
+# loaders не задаётся, поэтому app_directories указан сам.
+TEMPLATES = [{
+    **TEMPLATES[0],
+    'APP_DIRS': False,
+    'OPTIONS': {
+        **TEMPLATES[0]['OPTIONS'],
+        'debug': False,
+        'loaders': [
+            ('django.template.loaders.cached.Loader', [
+                'django.template.loaders.filesystem.Loader',
+                'django.template.loaders.app_directories.Loader',
+            ]),
+        ],
+    },
+}, *TEMPLATES[1:]]
+# wsgi.py компилирует все шаблоны до первого запроса
+WARM_TEMPLATES = True
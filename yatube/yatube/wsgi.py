@@ -9,8 +9,14 @@ https://docs.djangoproject.com/en/2.2/howto/deployment/wsgi/
 
 import os
 
+from django.conf import settings
 from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
 
 application = get_wsgi_application()
+
+# С кэширующим загрузчиком шаблоны разбираются до первого запроса
+if settings.WARM_TEMPLATES:
+    from core.warmup import warm_templates
+    warm_templates()